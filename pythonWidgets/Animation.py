@@ -0,0 +1,157 @@
+import math
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QElapsedTimer, QObject, QTimer, Qt
+from PySide6.QtGui import QGuiApplication
+
+DEFAULT_FPS = 60
+
+# Aiguille amortie : pulsation propre (rad/s) et taux d'amortissement (1 = critique, sans dépassement)
+DEFAULT_FREQUENCY = 12.0
+DEFAULT_DAMPING = 1.0
+
+# En dessous de ces écarts l'aiguille est posée sur sa cible
+SETTLE_DISTANCE = 0.05
+SETTLE_VELOCITY = 0.5
+
+# Pas d'intégration maximal, pour rester stable même après une image manquée
+MAX_STEP = 1 / 240
+
+
+class NeedleDynamics:
+    # Masse-ressort amortie qui rapproche la valeur affichée de sa cible
+    __slots__ = ("value", "target", "velocity", "frequency", "damping")
+
+    def __init__(self, value: float = 0.0, frequency: float = DEFAULT_FREQUENCY, damping: float = DEFAULT_DAMPING):
+        self.value = value
+        self.target = value
+        self.velocity = 0.0
+        self.frequency = frequency
+        self.damping = damping
+
+    def isSettled(self) -> bool:
+        return self.value == self.target and self.velocity == 0.0
+
+    def jump(self, value: float) -> None:
+        self.value = self.target = value
+        self.velocity = 0.0
+
+    def step(self, elapsed: float) -> bool:
+        # Avance de `elapsed` secondes, renvoie True tant que l'aiguille bouge
+        if self.isSettled():
+            return False
+
+        stiffness = self.frequency * self.frequency
+        friction = 2 * self.damping * self.frequency
+        steps = max(1, math.ceil(elapsed / MAX_STEP))
+        dt = elapsed / steps
+        for _ in range(steps):
+            # Euler semi-implicite : la vitesse d'abord, puis la position
+            self.velocity += (stiffness * (self.target - self.value) - friction * self.velocity) * dt
+            self.value += self.velocity * dt
+
+        if abs(self.target - self.value) <= SETTLE_DISTANCE and abs(self.velocity) <= SETTLE_VELOCITY:
+            self.jump(self.target)
+            return False
+        return True
+
+
+class AnimationDriver(QObject):
+    # Un seul timer pour toutes les aiguilles animées, arrêté dès qu'elles sont toutes posées
+
+    __instance = None
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        # id du propriétaire -> [callback, instant du dernier pas en ms, intervalle minimal propre en ms]
+        self.__animations: Dict[int, list] = {}
+        self.__watched = set()
+        self.__maxFps = None
+
+        self.__clock = QElapsedTimer()
+        self.__clock.start()
+
+        self.__timer = QTimer(self)
+        self.__timer.setTimerType(Qt.PreciseTimer)
+        self.__timer.timeout.connect(self.__tick)
+
+    @classmethod
+    def instance(cls) -> "AnimationDriver":
+        if cls.__instance is None:
+            cls.__instance = AnimationDriver()
+        return cls.__instance
+
+    def maxFps(self) -> float:
+        if self.__maxFps is not None:
+            return self.__maxFps
+
+        # Sans valeur explicite, on se cale sur la fréquence de l'écran
+        screen = QGuiApplication.primaryScreen()
+        if screen is not None and screen.refreshRate() > 0:
+            return screen.refreshRate()
+        return DEFAULT_FPS
+
+    def setMaxFps(self, fps: Optional[float]) -> None:
+        # Plafond commun à toutes les animations ; start(..., maxFps) limite un seul propriétaire
+        if fps is not None and fps <= 0:
+            raise ValueError("maxFps must be positive")
+        self.__maxFps = fps
+        self.__timer.setInterval(max(1, int(1000 / self.maxFps())))
+
+    def start(self, owner: QObject, callback: Callable[[float], bool], maxFps: Optional[float] = None) -> None:
+        # callback(secondes écoulées) est appelé à chaque image et renvoie False une fois posé.
+        # `maxFps` plafonne ce propriétaire seul : des pas du timer commun lui sont sautés
+        if maxFps is not None and maxFps <= 0:
+            raise ValueError("maxFps must be positive")
+        interval = 1000 / maxFps if maxFps is not None else 0
+        key = id(owner)
+        entry = self.__animations.get(key)
+        if entry is not None:
+            entry[2] = interval
+            return
+        self.__animations[key] = [callback, self.__clock.elapsed(), interval]
+
+        # Un propriétaire détruit en pleine animation ne doit pas rester inscrit
+        if key not in self.__watched:
+            self.__watched.add(key)
+            owner.destroyed.connect(partial(self.__forget, key))
+
+        if not self.__timer.isActive():
+            self.__timer.start(max(1, int(1000 / self.maxFps())))
+
+    def stop(self, owner: QObject) -> None:
+        self.__remove(id(owner))
+
+    def isAnimating(self, owner: QObject) -> bool:
+        return id(owner) in self.__animations
+
+    def animationCount(self) -> int:
+        return len(self.__animations)
+
+    def isActive(self) -> bool:
+        return self.__timer.isActive()
+
+    def __forget(self, key: int, *args) -> None:
+        self.__watched.discard(key)
+        self.__remove(key)
+
+    def __remove(self, key: int) -> None:
+        if self.__animations.pop(key, None) is not None and not self.__animations:
+            self.__timer.stop()
+
+    def __tick(self) -> None:
+        now = self.__clock.elapsed()
+        # Un pas arrivé jusqu'à une demi-période trop tôt compte comme à l'heure
+        tolerance = self.__timer.interval() / 2
+
+        for key, entry in list(self.__animations.items()):
+            callback, last, interval = entry
+            if now - last + tolerance < interval:
+                continue
+            entry[1] = now
+            if not callback((now - last) / 1000):
+                self.__animations.pop(key, None)
+
+        if not self.__animations:
+            self.__timer.stop()
@@ -0,0 +1,279 @@
+import argparse
+import bisect
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Rendu sans affichage, dans le processus principal comme dans les processus de travail
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QPoint
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QApplication, QWidget
+
+DEFAULT_SIZE = 400
+DEFAULT_CHUNK = 64
+FORMATS = ["png", "rgba"]
+
+
+def makeSpeedWidget() -> QWidget:
+    from .Speedometer import SpeedWidget
+    return SpeedWidget()
+
+
+def makeClockWidget() -> QWidget:
+    from .Clock import ClockWidget
+    return ClockWidget()
+
+
+def makeCompassWidget() -> QWidget:
+    from .Compass import CompassWidget
+
+    # Chaque image montre le cap de son échantillon, sans rattrapage animé
+    widget = CompassWidget()
+    widget.setAnimated(False)
+    return widget
+
+
+def parseNumber(text: str) -> float:
+    return float(text)
+
+
+def parseTime(text: str) -> datetime:
+    # Horodatage Unix en secondes ou date ISO 8601
+    try:
+        return datetime.fromtimestamp(float(text))
+    except ValueError:
+        return datetime.fromisoformat(text)
+
+
+# Nom -> (fabrique, application d'une valeur au widget, lecture d'une valeur)
+WIDGETS: Dict[str, tuple] = {
+    "SpeedWidget": (makeSpeedWidget, lambda widget, value: widget.setSpeed(value), parseNumber),
+    "ClockWidget": (makeClockWidget, lambda widget, value: widget.setTime(value), parseTime),
+    "CompassWidget": (makeCompassWidget, lambda widget, value: widget.setHeading(value), parseNumber),
+}
+
+
+def readSeries(path: str, name: str) -> Tuple[Optional[List[float]], list]:
+    # Une valeur par ligne, ou "temps,valeur" avec le temps en secondes ; "-" lit l'entrée standard
+    parse = WIDGETS[name][2]
+    times = []
+    values = []
+
+    with contextlib.ExitStack() as stack:
+        file = sys.stdin if path == "-" else stack.enter_context(open(path))
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) > 1:
+                times.append(float(fields[0]))
+            values.append(parse(fields[-1]))
+
+    if not times:
+        # Sans colonne de temps, les heures de l'horloge servent elles-mêmes d'horodatage
+        if name == "ClockWidget":
+            return [value.timestamp() for value in values], values
+        return None, values
+    if len(times) != len(values):
+        raise ValueError("either every sample or none of them must have a timestamp")
+    return times, values
+
+
+def resample(times: Sequence[float], values: Sequence, fps: float) -> list:
+    # Une image tous les 1/fps secondes, chacune montrant le dernier échantillon reçu à cet instant
+    if fps <= 0:
+        raise ValueError("fps must be positive")
+    if not values:
+        return []
+
+    frames = int((times[-1] - times[0]) * fps) + 1
+    return [values[max(0, bisect.bisect_right(times, times[0] + index / fps) - 1)] for index in range(frames)]
+
+
+class FrameRenderer:
+    # Un seul widget par processus, réutilisé d'une image à l'autre : le cadran statique reste en cache
+    # et chaque image ne coûte que le dessin des aiguilles
+
+    def __init__(self, name: str, size: int = DEFAULT_SIZE, dpr: float = 1.0, antialiasing: bool = True,
+                 strategy: str = "Pixmap"):
+        from .DialSpec import RenderStrategy
+
+        factory, self.__apply, _ = WIDGETS[name]
+        self.__widget = factory()
+        self.__widget.resize(size, size)
+        self.__widget.setAntialiasing(antialiasing)
+        self.__widget.setRenderStrategy(RenderStrategy[strategy])
+
+        self.__image = QImage(int(size * dpr), int(size * dpr), QImage.Format_RGBA8888_Premultiplied)
+        self.__image.setDevicePixelRatio(dpr)
+
+    def render(self, value, target: Optional[QImage] = None) -> QImage:
+        # Sans `target`, l'image est réutilisée : elle doit être consommée avant le rendu suivant
+        image = self.__image if target is None else target
+        self.__apply(self.__widget, value)
+        image.fill(0)
+        painter = QPainter(image)
+        self.__widget.render(painter, QPoint())
+        painter.end()
+        return image
+
+    def close(self) -> None:
+        self.__widget.deleteLater()
+
+
+def rawRGBA(image: QImage) -> bytes:
+    # RGBA 8 bits non prémultiplié, sans remplissage de fin de ligne (la largeur est un multiple de 4 octets)
+    # L'image convertie doit vivre le temps de la copie de ses octets
+    converted = image.convertToFormat(QImage.Format_RGBA8888)
+    return bytes(converted.constBits())
+
+
+def renderChunk(renderer: FrameRenderer, start: int, values: Sequence, format: str,
+                pattern: Optional[str]) -> bytes:
+    # Les PNG sont écrits directement par le processus qui les rend, les images brutes sont renvoyées dans l'ordre
+    raw = bytearray()
+    for offset, value in enumerate(values):
+        image = renderer.render(value)
+        if format == "png":
+            if not image.save(pattern % (start + offset), "PNG"):
+                raise OSError("cannot write " + pattern % (start + offset))
+        else:
+            raw += rawRGBA(image)
+    return bytes(raw)
+
+
+# Application et widget propres à chaque processus de travail
+_app = None
+_renderer = None
+
+
+def _initWorker(*args) -> None:
+    global _app, _renderer
+    _app = QApplication.instance() or QApplication([])
+    _renderer = FrameRenderer(*args)
+
+
+def _renderWorkerChunk(start: int, values: Sequence, format: str, pattern: Optional[str]) -> bytes:
+    return renderChunk(_renderer, start, values, format, pattern)
+
+
+def batchRender(name: str, values: Sequence, output: str, format: str = "png", size: int = DEFAULT_SIZE,
+                dpr: float = 1.0, antialiasing: bool = True, strategy: str = "Pixmap",
+                workers: Optional[int] = None, chunkSize: int = DEFAULT_CHUNK) -> dict:
+    # `output` : motif printf des fichiers PNG ("frames/%06d.png"), ou fichier de sortie brute ("-" pour stdout)
+    if format not in FORMATS:
+        raise ValueError("unknown format " + format)
+    if format == "png":
+        try:
+            output % 0
+        except TypeError:
+            raise ValueError("the PNG output must be a pattern such as frames/%06d.png") from None
+    if chunkSize <= 0:
+        raise ValueError("chunkSize must be positive")
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, values[start:start + chunkSize]) for start in range(0, len(values), chunkSize)]
+    pattern = output if format == "png" else None
+    settings = (name, size, dpr, antialiasing, strategy)
+
+    with contextlib.ExitStack() as stack:
+        sink = None
+        if format == "rgba":
+            sink = sys.stdout.buffer if output == "-" else stack.enter_context(open(output, "wb"))
+
+        start = time.perf_counter()
+        if workers == 1:
+            app = QApplication.instance() or QApplication([])
+            renderer = FrameRenderer(*settings)
+            for first, chunk in chunks:
+                raw = renderChunk(renderer, first, chunk, format, pattern)
+                if sink is not None:
+                    sink.write(raw)
+            renderer.close()
+        else:
+            # spawn : un processus issu d'un fork hériterait d'un état Qt inutilisable
+            executor = stack.enter_context(ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initWorker, initargs=settings))
+
+            # Quelques paquets d'avance par processus, écrits dans l'ordre sans tout garder en mémoire
+            pending = deque()
+            for first, chunk in chunks:
+                pending.append(executor.submit(_renderWorkerChunk, first, chunk, format, pattern))
+                if len(pending) >= 2 * workers:
+                    raw = pending.popleft().result()
+                    if sink is not None:
+                        sink.write(raw)
+            while pending:
+                raw = pending.popleft().result()
+                if sink is not None:
+                    sink.write(raw)
+        if sink is not None:
+            sink.flush()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "widget": name,
+        "frames": len(values),
+        "size": size,
+        "dpr": dpr,
+        "width": int(size * dpr),
+        "height": int(size * dpr),
+        "format": format,
+        "strategy": strategy,
+        "workers": workers,
+        "seconds": elapsed,
+        "framesPerSecond": len(values) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render gauge frames offline from a recorded time series")
+    parser.add_argument("widget", choices=list(WIDGETS))
+    parser.add_argument("input", help="one value per line, or 'seconds,value'; '-' reads stdin")
+    parser.add_argument("output", help="PNG file pattern such as frames/%%06d.png, or the raw output file, '-' for stdout")
+    parser.add_argument("--format", choices=FORMATS, default="png",
+                        help="PNG sequence or raw 8 bit RGBA frames, one after the other")
+    parser.add_argument("--fps", type=float,
+                        help="resample a timestamped series to this frame rate, otherwise one frame per sample")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--dpr", type=float, default=1.0)
+    parser.add_argument("--antialiasing", choices=["on", "off"], default="on")
+    parser.add_argument("--strategy", choices=["Pixmap", "Picture"], default="Pixmap")
+    parser.add_argument("--workers", type=int, help="rendering processes, one per core by default")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="frames sent to a process at a time")
+    parser.add_argument("--report", help="write the JSON report to this file instead of stderr")
+    args = parser.parse_args(argv)
+
+    times, values = readSeries(args.input, args.widget)
+    if args.fps is not None:
+        if times is None:
+            parser.error("--fps needs a 'seconds,value' series")
+        values = resample(times, values, args.fps)
+
+    report = batchRender(args.widget, values, args.output, args.format, args.size, args.dpr,
+                         args.antialiasing == "on", args.strategy, args.workers, args.chunk)
+
+    # stdout peut porter les images brutes : le rapport va sur stderr par défaut
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stderr, indent=2)
+        print(file=sys.stderr)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,378 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# Le banc de mesure tourne sans affichage : on rend les widgets dans des QImage
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6
+from PySide6.QtCore import QPoint, qVersion
+from PySide6.QtGui import QImage, QPainter, QRegion
+from PySide6.QtWidgets import QApplication, QWidget
+
+NOMINAL_FPS = 60
+
+DEFAULT_SIZES = [100, 200, 400, 800]
+DEFAULT_DPRS = [1.0, 2.0]
+DEFAULT_RATES = [0, 60, 1000]
+
+DEFAULT_DASHBOARD_COUNTS = [1, 10, 50, 100, 200]
+DEFAULT_CELL_SIZE = 100
+DEFAULT_CHANGED = 4
+
+
+def sweep(step: int) -> int:
+    from .Speedometer import MAX_SPEED
+
+    # Aller-retour sur toute la plage de vitesses
+    value = step % (2 * MAX_SPEED)
+    return value if value <= MAX_SPEED else 2 * MAX_SPEED - value
+
+
+def speedFeed(widget: QWidget, step: int) -> None:
+    widget.setSpeed(sweep(step))
+
+
+def compassFeed(widget: QWidget, step: int) -> None:
+    widget.setHeading(step % 360)
+
+
+def makeSpeedWidget() -> QWidget:
+    from .Speedometer import SpeedWidget
+    return SpeedWidget()
+
+
+def makeClockWidget() -> QWidget:
+    from .Clock import ClockWidget
+    return ClockWidget()
+
+
+def makeCompassWidget() -> QWidget:
+    from .Compass import CompassWidget
+
+    # Pas d'animation : chaque valeur reçue est affichée telle quelle
+    widget = CompassWidget()
+    widget.setAnimated(False)
+    return widget
+
+
+def makeDigitalClockWidget() -> QWidget:
+    from .DigitalClock import DigitalClockWidget
+    return DigitalClockWidget()
+
+
+# Nom -> (fabrique, fonction d'alimentation en valeurs ou None si le widget n'en reçoit pas)
+WIDGETS: Dict[str, tuple] = {
+    "SpeedWidget": (makeSpeedWidget, speedFeed),
+    "ClockWidget": (makeClockWidget, None),
+    "CompassWidget": (makeCompassWidget, compassFeed),
+    "DigitalClockWidget": (makeDigitalClockWidget, None),
+}
+
+# Rendus HiDPI déjà comparés au rendu natif, par configuration : le débit ne change pas l'image
+_verified: Dict[tuple, float] = {}
+
+
+def verifyRatio(name: str, size: int, dpr: float, antialiasing: bool, strategy: Optional[str],
+                levelOfDetail: bool) -> Optional[float]:
+    # Avant de chronométrer un ratio autre que 1, un widget configuré comme celui du banc est rendu de la même
+    # façon, puis comparé au même widget rendu sur un écran de ce ratio : une image fausse ne produit pas de mesure.
+    # Renvoie l'écart en pour cent des pixels, None pour les widgets que RatioCheck ne sait pas comparer
+    from . import BatchRender, RatioCheck
+    from .DialSpec import RenderStrategy
+
+    if name not in RatioCheck.VALUES:
+        return None
+    strategy = strategy or "Pixmap"
+    key = (name, size, dpr, antialiasing, strategy, levelOfDetail)
+    if key not in _verified:
+        # Un widget à part : celui du banc garde son état, l'horloge en particulier continue de suivre l'heure
+        widget = WIDGETS[name][0]()
+        widget.resize(size, size)
+        widget.setAntialiasing(antialiasing)
+        widget.setRenderStrategy(RenderStrategy[strategy])
+        widget.setLevelOfDetail(levelOfDetail)
+        _, apply, parse = BatchRender.WIDGETS[name]
+        apply(widget, parse(RatioCheck.VALUES[name]))
+
+        image = QImage(int(size * dpr), int(size * dpr), QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        image.fill(0)
+        painter = QPainter(image)
+        widget.render(painter, QPoint())
+        painter.end()
+        widget.deleteLater()
+
+        expected = RatioCheck.nativeFrame(name, size, dpr, strategy, antialiasing, levelOfDetail)
+        _verified[key] = RatioCheck.mismatch(expected, RatioCheck.frameBytes(image))
+
+    if _verified[key] > RatioCheck.TOLERANCE[strategy]:
+        raise RuntimeError("%s frames at dpr %g differ from a native render (%.2f %% of pixels)"
+                           % (name, dpr, _verified[key]))
+    return _verified[key]
+
+
+# Widgets dont le cadran statique peut être rendu en pixmap ou en liste d'affichage QPicture
+STRATEGY_WIDGETS = {"SpeedWidget", "ClockWidget", "CompassWidget"}
+DEFAULT_STRATEGIES = ["Pixmap", "Picture"]
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": cuts[49],
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "max": ordered[-1],
+    }
+
+
+def renderFrames(widget: QWidget, image: QImage, frames: int, rate: int,
+                 feed: Optional[Callable[[QWidget, int], None]]) -> List[float]:
+    # `rate` mises à jour de valeur par seconde, réparties sur des images à NOMINAL_FPS
+    timings = []
+    pending = 0.0
+    step = 0
+
+    for _ in range(frames):
+        start = time.perf_counter()
+
+        if feed is not None:
+            pending += rate / NOMINAL_FPS
+            while pending >= 1:
+                feed(widget, step)
+                step += 1
+                pending -= 1
+
+        painter = QPainter(image)
+        widget.render(painter, QPoint())
+        painter.end()
+
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def measureAllocations(widget: QWidget, image: QImage, frames: int, rate: int,
+                       feed: Optional[Callable[[QWidget, int], None]]) -> Dict[str, float]:
+    # Seules les allocations Python sont visibles, pas celles faites côté Qt
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    renderFrames(widget, image, frames, rate, feed)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    return {
+        "blocksPerFrame": sum(stat.count_diff for stat in stats) / frames,
+        "bytesPerFrame": sum(stat.size_diff for stat in stats) / frames,
+        "peakBytes": peak,
+    }
+
+
+def benchmark(name: str, size: int, dpr: float, antialiasing: bool, rate: int,
+              frames: int, warmup: int, strategy: Optional[str] = None, levelOfDetail: bool = False) -> dict:
+    factory, feed = WIDGETS[name]
+
+    widget = factory()
+    widget.resize(size, size)
+    widget.setAntialiasing(antialiasing)
+    if strategy is not None:
+        from .DialSpec import RenderStrategy
+        widget.setRenderStrategy(RenderStrategy[strategy])
+    if levelOfDetail:
+        widget.setLevelOfDetail(True)
+
+    # Le widget garde son ratio de 1 hors écran : c'est la cible qui porte le ratio, et les calques du cadran
+    # sont construits à celui de la cible
+    image = QImage(int(size * dpr), int(size * dpr), QImage.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+    image.fill(0)
+    ratioMismatch = verifyRatio(name, size, dpr, antialiasing, strategy, levelOfDetail) if dpr != 1 else None
+
+    renderFrames(widget, image, warmup, rate, feed)
+    timings = renderFrames(widget, image, frames, rate, feed)
+    allocations = measureAllocations(widget, image, max(1, frames // 10), rate, feed)
+
+    widget.close()
+    widget.deleteLater()
+
+    return {
+        "widget": name,
+        "size": size,
+        "dpr": dpr,
+        "antialiasing": antialiasing,
+        "rate": rate if feed is not None else 0,
+        "strategy": strategy,
+        "levelOfDetail": levelOfDetail,
+        "frames": frames,
+        "ratioMismatchPercent": ratioMismatch,
+        "paintMs": percentiles(timings),
+        "allocations": allocations,
+    }
+
+
+def newImage(width: int, height: int) -> QImage:
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    return image
+
+
+def timeFrames(frames: int, frame: Callable[[int], None]) -> List[float]:
+    timings = []
+    for step in range(frames):
+        start = time.perf_counter()
+        frame(step)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def benchmarkDashboard(count: int, cellSize: int, changed: int, frames: int, warmup: int) -> dict:
+    from .Dashboard import DashboardWidget
+    from .Speedometer import SpeedWidget
+
+    dashboard = DashboardWidget(count)
+    columns = dashboard.columns()
+    dashboard.resize(columns * cellSize, dashboard.rows() * cellSize)
+    image = newImage(dashboard.width(), dashboard.height())
+    changed = min(changed, count)
+
+    def fullFrame(step: int) -> None:
+        # Tous les compteurs changent : toute la grille est repeinte
+        for index in range(count):
+            dashboard.setSpeed(index, sweep(step + index))
+        painter = QPainter(image)
+        dashboard.render(painter, QPoint())
+        painter.end()
+
+    def partialFrame(step: int) -> None:
+        # Seuls `changed` compteurs changent : on ne repeint que leurs cases
+        region = QRegion()
+        for offset in range(changed):
+            index = (step * changed + offset) % count
+            dashboard.setSpeed(index, sweep(step + index))
+            region += dashboard.cellRect(index)
+        painter = QPainter(image)
+        dashboard.render(painter, region.boundingRect().topLeft(), region)
+        painter.end()
+
+    # Référence : un SpeedWidget indépendant par compteur
+    widgets = []
+    for index in range(count):
+        widget = SpeedWidget()
+        widget.resize(cellSize, cellSize)
+        widgets.append((widget, dashboard.cellRect(index).topLeft()))
+
+    def widgetsFrame(step: int) -> None:
+        painter = QPainter(image)
+        for index, (widget, origin) in enumerate(widgets):
+            widget.setSpeed(sweep(step + index))
+            widget.render(painter, origin)
+        painter.end()
+
+    results = {}
+    for name, frame in (("fullPaintMs", fullFrame), ("partialPaintMs", partialFrame),
+                        ("widgetsPaintMs", widgetsFrame)):
+        timeFrames(warmup, frame)
+        results[name] = percentiles(timeFrames(frames, frame))
+
+    for widget, _ in widgets:
+        widget.deleteLater()
+    dashboard.deleteLater()
+
+    return {
+        "gauges": count,
+        "cellSize": cellSize,
+        "columns": columns,
+        "changed": changed,
+        "frames": frames,
+        **results,
+    }
+
+
+def run(widgets: List[str], sizes: List[int], dprs: List[float], antialiasing: List[bool],
+        rates: List[int], frames: int, warmup: int, dashboardCounts: List[int] = (),
+        cellSize: int = DEFAULT_CELL_SIZE, changed: int = DEFAULT_CHANGED,
+        strategies: List[str] = ("Pixmap",), levelOfDetail: bool = False) -> dict:
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+    for name in widgets:
+        # Le débit de mises à jour n'a de sens que pour les widgets alimentés en valeurs
+        widgetRates = rates if WIDGETS[name][1] is not None else [0]
+        widgetStrategies = strategies if name in STRATEGY_WIDGETS else [None]
+        for size in sizes:
+            for dpr in dprs:
+                for aa in antialiasing:
+                    for rate in widgetRates:
+                        for strategy in widgetStrategies:
+                            # Le niveau de détail ne concerne que les cadrans analogiques
+                            results.append(benchmark(name, size, dpr, aa, rate, frames, warmup, strategy,
+                                                     levelOfDetail and strategy is not None))
+                            app.processEvents()
+
+    # Temps de peinture d'un tableau de bord en fonction du nombre de compteurs
+    dashboard = []
+    for count in dashboardCounts:
+        dashboard.append(benchmarkDashboard(count, cellSize, changed, frames, warmup))
+        app.processEvents()
+
+    return {
+        "python": platform.python_version(),
+        "pyside": PySide6.__version__,
+        "qt": qVersion(),
+        "platform": os.environ.get("QT_QPA_PLATFORM"),
+        "nominalFps": NOMINAL_FPS,
+        "results": results,
+        "dashboard": dashboard,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offscreen paint benchmark for the widgets")
+    parser.add_argument("--widgets", nargs="+", choices=list(WIDGETS), default=list(WIDGETS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--dprs", nargs="+", type=float, default=DEFAULT_DPRS)
+    parser.add_argument("--antialiasing", nargs="+", choices=["on", "off"], default=["on", "off"])
+    parser.add_argument("--rates", nargs="+", type=int, default=DEFAULT_RATES,
+                        help="value updates per second fed to the widget")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--strategies", nargs="+", choices=DEFAULT_STRATEGIES, default=DEFAULT_STRATEGIES,
+                        help="static dial rendering strategies for the analog widgets")
+    parser.add_argument("--level-of-detail", action="store_true",
+                        help="let the analog widgets drop ticks and labels too dense for their size")
+    parser.add_argument("--dashboard-counts", nargs="*", type=int, default=DEFAULT_DASHBOARD_COUNTS,
+                        help="gauge counts for the dashboard scaling run, none to skip it")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE,
+                        help="size in pixels of one dashboard gauge")
+    parser.add_argument("--changed", type=int, default=DEFAULT_CHANGED,
+                        help="gauges changing per frame in the partial dashboard repaint")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.widgets, args.sizes, args.dprs, [value == "on" for value in args.antialiasing],
+                 args.rates, args.frames, args.warmup, args.dashboard_counts, args.cell_size, args.changed,
+                 args.strategies, args.level_of_detail)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
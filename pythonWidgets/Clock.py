@@ -1,124 +1,195 @@
 import math
 import sys
 from datetime import datetime
+from typing import Optional
+
+from PySide6.QtGui import QPainter, QColor, QCloseEvent, QPen, QBrush, QShowEvent, QHideEvent
+from PySide6.QtCore import QEvent, Qt
+from PySide6.QtGui import QRegion
+from PySide6.QtWidgets import QMainWindow, QApplication
+
+from .ClockScheduler import ClockScheduler, SECOND, MINUTE
+from .DialSpec import DialRenderer, DialSpec, Hand, Labels, Needle, RenderStrategy, Ring, Scale, Ticks, TickShapes, Values
+from .GaugeWidget import GaugeWidget, paintRatio
+from .PaintStats import PaintStats
+from .Theme import DEFAULT_THEME, resources
+from .UpdateScheduler import UpdateScheduler
+
+# Soixante minutes et douze heures sur un tour complet, en partant de midi
+MINUTE_SCALE = Scale(0, 60, -math.pi / 2, 360)
+HOUR_SCALE = Scale(0, 12, -math.pi / 2, 360)
+
+# Une graduation toutes les minutes, celles des heures étant tracées à part
+HOUR_TICKS = MINUTE_SCALE.table(range(0, 60, 5))
+MINUTE_TICKS = MINUTE_SCALE.table([step for step in range(60) if step % 5])
+
+# Stylos et pinceaux construits une seule fois et réutilisés à chaque peinture
+TICK_PEN = QPen(Qt.white)
+TICK_BRUSH = QBrush(Qt.white)
+DIAL_BRUSH = resources.brush(DEFAULT_THEME.colors["dial"])
+SECOND_PEN = QPen(QColor(255, 0, 0, int(256 * 0.6)), 3)
+HAND_PEN = QPen(QColor(255, 0, 0))
+HAND_BRUSH = QBrush(QColor(255, 0, 0, 150))
+
+CLOCK_DIAL = DialSpec(0.95, (
+    Ring(1, DIAL_BRUSH, gradient="bezel"),
+    # Graduations de minute, puis d'heure et leur numéro
+    Ticks(MINUTE_TICKS, 0.85, 0.9, TICK_PEN),
+    TickShapes(HOUR_TICKS, ((-0.02, 0.9), (-0.01, 0.8), (0.01, 0.8), (0.02, 0.9)), TICK_PEN, TICK_BRUSH),
+    Labels(HOUR_TICKS, tuple(str(hour or 12) for hour in range(12)), 0.7, 16, -8, 0.04, TICK_PEN),
+    # Trotteuse, aiguille des minutes et des heures
+    Hand("second", MINUTE_SCALE.angle, 0.95, SECOND_PEN),
+    Needle(MINUTE_SCALE.angle, 0.93, 0.1, 0.4, HAND_PEN, HAND_BRUSH, channel="minute"),
+    Needle(HOUR_SCALE.angle, 0.6, 0.1, 0.3, HAND_PEN, HAND_BRUSH, channel="hour"),
+    # Disque interne
+    Ring(0.18, DIAL_BRUSH, gradient="bezel"),
+))
+
+
+class ClockModel:
+    # Heure affichée par une horloge, indépendante de tout widget ; sans __dict__, une instance reste minuscule
+    __slots__ = ("__time", "__secondsVisible")
+
+    def __init__(self, time: Optional[datetime] = None, secondsVisible: bool = True):
+        # Heure affichée ; None suit l'horloge système
+        self.__time = time
+        self.__secondsVisible = secondsVisible
+
+    def time(self) -> Optional[datetime]:
+        return self.__time
+
+    def secondsVisible(self) -> bool:
+        return self.__secondsVisible
+
+    def now(self) -> datetime:
+        return self.__time if self.__time is not None else datetime.now()
+
+    # Les setters renvoient True si l'affichage a changé
+
+    def setTime(self, value: Optional[datetime]) -> bool:
+        if value == self.__time:
+            return False
+        self.__time = value
+        return True
+
+    def setSecondsVisible(self, value: bool) -> bool:
+        if value == self.__secondsVisible:
+            return False
+        self.__secondsVisible = value
+        return True
+
+
+def clockValues(model: ClockModel) -> Values:
+    # Canaux du cadran à l'heure du modèle
+    now = model.now()
+    second = now.second if model.secondsVisible() else 0
+
+    # Sans trotteuse, la minute ne tient pas compte des secondes
+    values = {"minute": now.minute + second / 60, "hour": now.hour % 12 + now.minute / 60}
+    if model.secondsVisible():
+        values["second"] = second
+    return values
+
+
+class ClockWidget(GaugeWidget):
 
-from PySide6.QtGui import QPainter, QColor, QCloseEvent, QLinearGradient, QPen
-from PySide6.QtCore import QPoint, Qt, QPointF, QTimer
-from PySide6.QtGui import QPaintEvent
-from PySide6.QtWidgets import QMainWindow, QWidget, QApplication
+    def __init__(self):
+        super().__init__()
+        self.__model = ClockModel()
+        self.__antialiasing = True
+        self.__scheduler = UpdateScheduler(self)
+        self.__paintStats = None
 
+        # Plan de rendu du cadran, fond et disque interne partagés entre horloges
+        self.__dial = DialRenderer(CLOCK_DIAL)
 
-class ClockWidget(QWidget):
+    def updateScheduler(self) -> UpdateScheduler:
+        return self.__scheduler
 
-    def __init__(self):
-        super().__init__()
-        self.__timer = QTimer(self)
-        self.__timer.timeout.connect(self.repaint)
-        self.__timer.start(1000)
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
+
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        # Instrumentation optionnelle des peintures, désactivée par défaut
+        self.__paintStats = stats
+
+    def antialiasing(self) -> bool:
+        return self.__antialiasing
+
+    def setAntialiasing(self, value: bool) -> None:
+        if value == self.__antialiasing:
+            return
+        self.__antialiasing = value
+        self.invalidateCache()
+
+    def model(self) -> ClockModel:
+        return self.__model
+
+    def secondsVisible(self) -> bool:
+        return self.__model.secondsVisible()
+
+    def setSecondsVisible(self, value: bool) -> None:
+        # Sans trotteuse, un réveil par minute suffit
+        if not self.__model.setSecondsVisible(value):
+            return
+        if self.isVisible():
+            self.__subscribe()
+        self.update()
+
+    def time(self) -> Optional[datetime]:
+        return self.__model.time()
+
+    def setTime(self, value: Optional[datetime]) -> None:
+        # Heure figée, par exemple pour rendre des images hors ligne ; None revient à l'heure courante
+        if self.__model.setTime(value):
+            self.update()
+
+    def __subscribe(self) -> None:
+        ClockScheduler.instance().subscribe(self, self.__tick, SECOND if self.__model.secondsVisible() else MINUTE)
+
+    def __tick(self) -> None:
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+        self.__scheduler.requestUpdate()
+
+    def showEvent(self, event: QShowEvent) -> None:
+        # L'horloge n'est réveillée que lorsqu'elle est visible
+        super().showEvent(event)
+        self.__subscribe()
+        self.update()
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        super().hideEvent(event)
+        ClockScheduler.instance().unsubscribe(self)
 
     def closeEvent(self, event: QCloseEvent) -> None:
-        self.__timer.stop()
-
-    def paintEvent(self, event: QPaintEvent) -> None:
-        super().paintEvent(event)
-
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        # On dessine le cercle de l'horloge avec un dégradé autour
-        radius = 0.95 * (min(self.width(), self.height()) / 2)
-
-        centerX = int(self.width() / 2)
-        centerY = int(self.height() / 2)
-
-        linearGradient = QLinearGradient(QPointF(0, 0), QPointF(0, radius * 2))
-        linearGradient.setColorAt(0, QColor(0xE0, 0xE0, 0xE0))
-        linearGradient.setColorAt(0.5, QColor(0x6E, 0x77, 0x74))
-        linearGradient.setColorAt(0.51, QColor(0x0a, 0x0e, 0x0a))
-        linearGradient.setColorAt(1, QColor(0x0a, 0x08, 0x09))
-
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius, radius)
-
-        # On s'apprète à dessiner les graduations sur l'horloge
-        font = painter.font()
-        font.setPointSize(16)
-        painter.setFont(font)
-
-        angle = -math.pi / 2 + math.pi / 30
-        hour = 1
-        for step in range(12 * 5):
-            angle += math.pi / 30
-            hour += 1
-
-            painter.setPen(Qt.white)
-            painter.setBrush(Qt.white)
-
-            if hour % 5 == 0:
-                # Tracé d'une graduation d'heure
-                painter.drawPolygon([
-                    QPointF(centerX + math.cos(angle - 0.02) * radius * 0.9,
-                            centerY + math.sin(angle - 0.02) * radius * 0.9),
-                    QPointF(centerX + math.cos(angle - 0.01) * radius * 0.8,
-                            centerY + math.sin(angle - 0.01) * radius * 0.8),
-                    QPointF(centerX + math.cos(angle + 0.01) * radius * 0.8,
-                            centerY + math.sin(angle + 0.01) * radius * 0.8),
-                    QPointF(centerX + math.cos(angle + 0.02) * radius * 0.9,
-                            centerY + math.sin(angle + 0.02) * radius * 0.9)
-                ])
-                delta = radius * 0.04
-                painter.drawText(int(centerX + math.cos(angle) * radius * 0.7) - 8,
-                                 int(centerY + math.sin(angle) * radius * 0.7 + delta),
-                                 str(hour // 5))
-            else:
-                # Tracé d'une graduation de minute
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.85,
-                            centerY + math.sin(angle) * radius * 0.85),
-                    QPointF(centerX + math.cos(angle) * radius * 0.9,
-                            centerY + math.sin(angle) * radius * 0.9)
-                )
-
-        now = datetime.now()
-
-        # On dessine la trotteuse
-        painter.setPen(QPen(QColor(255, 0, 0, int(256 * 0.6)), 3))
-        angle = - math.pi / 2 + now.second * math.pi / 30
-        destX = math.cos(angle) * radius * 0.95
-        destY = math.sin(angle) * radius * 0.95
-        painter.drawLine(centerX, centerY, int(centerX + destX), int(centerY + destY))
-
-        # On dessine l'aiguille des minutes
-        painter.setPen(QColor(255, 0, 0))
-        painter.setBrush(QColor(255, 0, 0, 150))
-
-        minuteAngle = math.pi * 2 * (now.minute / 60 + now.second / 3600)
-        minuteAngle = -(math.pi / 2 - minuteAngle)
-
-        painter.drawPolygon([
-            QPointF(centerX + math.cos(minuteAngle) * radius * 0.93, centerY + math.sin(minuteAngle) * radius * 0.93),
-            QPointF(centerX + math.cos(minuteAngle - 0.4) * radius * 0.1,
-                    centerY + math.sin(minuteAngle - 0.4) * radius * 0.1),
-            QPointF(centerX + math.cos(minuteAngle + 0.4) * radius * 0.1,
-                    centerY + math.sin(minuteAngle + 0.4) * radius * 0.1)
-        ])
-
-        # On dessine l'aiguille des heures
-        hourAngle = math.pi * 2 * ((now.hour % 12 + now.minute / 60) / 12)
-        hourAngle = -(math.pi / 2 - hourAngle)
-
-        painter.drawPolygon([
-            QPointF(centerX + math.cos(hourAngle) * radius * 0.6, centerY + math.sin(hourAngle) * radius * 0.6),
-            QPointF(centerX + math.cos(hourAngle - 0.3) * radius * 0.1,
-                    centerY + math.sin(hourAngle - 0.3) * radius * 0.1),
-            QPointF(centerX + math.cos(hourAngle + 0.3) * radius * 0.1,
-                    centerY + math.sin(hourAngle + 0.3) * radius * 0.1)
-        ])
-
-        # On dessine le disque interne
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius * 0.18, radius * 0.18)
+        ClockScheduler.instance().unsubscribe(self)
+
+    def renderStrategy(self) -> RenderStrategy:
+        return self.__dial.strategy()
+
+    def setRenderStrategy(self, strategy: RenderStrategy) -> None:
+        # Pixmap : blit le plus rapide ; Picture : liste d'affichage rejouée à l'échelle, mémoire constante
+        self.__dial.setStrategy(strategy)
+        self.update()
+
+    def invalidateCache(self) -> None:
+        # À appeler après un changement de thème ; les calques partagés sont indexés sur la police
+        self.__dial.invalidate()
+        self.update()
+
+    def changeEvent(self, event: QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange, QEvent.FontChange):
+            self.invalidateCache()
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        # Le cadran et le disque interne ne sont redessinés que si la taille ou le DPR change
+        dpr = paintRatio(painter)
+        self.__dial.paint(painter, self.width(), self.height(), dpr, self.__antialiasing,
+                          self.font(), clockValues(self.__model), self.detail())
+
+        self.__scheduler.paintPerformed()
 
 
 class MainWindow(QMainWindow):
@@ -0,0 +1,86 @@
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QDateTime, QObject, QTimer, Qt
+
+# Résolutions disponibles, en secondes
+SECOND = 1
+MINUTE = 60
+
+# On se réveille un peu après la frontière pour être sûr de l'avoir franchie
+TICK_SLACK_MS = 2
+
+
+class ClockScheduler(QObject):
+    # Un seul timer pour toutes les horloges, recalé sur la seconde (ou minute) murale à chaque tick
+
+    __instance = None
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        # id du widget -> [callback, résolution, dernière frontière servie]
+        self.__subscribers: Dict[int, list] = {}
+        self.__watched = set()
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setTimerType(Qt.PreciseTimer)
+        self.__timer.timeout.connect(self.__tick)
+
+    @classmethod
+    def instance(cls) -> "ClockScheduler":
+        if cls.__instance is None:
+            cls.__instance = ClockScheduler()
+        return cls.__instance
+
+    def subscribe(self, owner: QObject, callback: Callable[[], None], resolution: int = SECOND) -> None:
+        key = id(owner)
+        now = QDateTime.currentMSecsSinceEpoch()
+        self.__subscribers[key] = [callback, resolution, now // (resolution * 1000)]
+
+        # Un widget détruit sans avoir été caché ne doit pas rester abonné
+        if key not in self.__watched:
+            self.__watched.add(key)
+            owner.destroyed.connect(partial(self.__forget, key))
+
+        self.__arm()
+
+    def unsubscribe(self, owner: QObject) -> None:
+        if self.__subscribers.pop(id(owner), None) is not None:
+            self.__arm()
+
+    def isSubscribed(self, owner: QObject) -> bool:
+        return id(owner) in self.__subscribers
+
+    def subscriberCount(self) -> int:
+        return len(self.__subscribers)
+
+    def isActive(self) -> bool:
+        return self.__timer.isActive()
+
+    def __forget(self, key: int, *args) -> None:
+        self.__watched.discard(key)
+        if self.__subscribers.pop(key, None) is not None:
+            self.__arm()
+
+    def __arm(self) -> None:
+        # Plus personne à réveiller : le timer s'arrête
+        if not self.__subscribers:
+            self.__timer.stop()
+            return
+
+        period = min(entry[1] for entry in self.__subscribers.values()) * 1000
+        now = QDateTime.currentMSecsSinceEpoch()
+        self.__timer.start(period - now % period + TICK_SLACK_MS)
+
+    def __tick(self) -> None:
+        now = QDateTime.currentMSecsSinceEpoch()
+
+        for entry in list(self.__subscribers.values()):
+            callback, resolution, last = entry
+            boundary = now // (resolution * 1000)
+            if boundary != last:
+                entry[2] = boundary
+                callback()
+
+        self.__arm()
@@ -1,135 +1,230 @@
 import math
 import sys
 import random
+from typing import Optional
 
-from PySide6.QtCore import QPointF, QPoint, Qt, QTimer
-from PySide6.QtGui import QPainter, QColor, QLinearGradient, QPen
-from PySide6.QtGui import QPaintEvent
-from PySide6.QtWidgets import QMainWindow, QWidget, QApplication
+from PySide6.QtCore import Qt, QTimer, QEvent, Slot
+from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QCloseEvent
+from PySide6.QtGui import QRegion
+from PySide6.QtWidgets import QMainWindow, QApplication
+
+from .Animation import AnimationDriver
+from .DialGeometry import TickTable
+from .DialSpec import DialRenderer, DialSpec, Labels, Needle, RenderStrategy, Ring, Rose, Ticks, TickShapes
+from .GaugeWidget import GaugeWidget, paintRatio
+from .PaintStats import PaintStats
+from .Theme import DEFAULT_THEME, resources
 
 cardinalPoint = {"N": 360, "S": 180, "E": 90, "O": 270}
 
 
-class CompassWidget(QWidget):
+def declinationToAngle(declination: float) -> float:
+    return -math.pi / 2 + math.radians(declination)
+
+
+# Time constant (s) of the heading animation and gap (degrees) under which it stops
+ANIMATION_TIME_CONSTANT = 0.12
+SETTLE_THRESHOLD = 0.05
+
+
+def shortestArc(start: float, end: float) -> float:
+    # Signed difference in degrees, between -180 and 180
+    return (end - start + 180) % 360 - 180
+
+
+# Graduation tables are computed once
+CARDINAL_NAMES = sorted(cardinalPoint, key=cardinalPoint.get)
+CARDINAL_TICKS = TickTable([declinationToAngle(cardinalPoint[name]) for name in CARDINAL_NAMES])
+GRADUATION_TICKS = TickTable([declinationToAngle(declination) for declination in range(10, 361, 10)
+                              if declination % 90])
+LABEL_TICKS = TickTable([declinationToAngle(declination) for declination in range(30, 361, 30)])
+DEGREE_LABELS = [str(declination % 360) for declination in range(30, 361, 30)]
+
+# Pens and brushes are built once and reused by every paint
+GRADUATION_PEN = QPen(Qt.white)
+GRADUATION_BRUSH = QBrush(Qt.white)
+DIAL_BRUSH = resources.brush(DEFAULT_THEME.colors["dial"])
+NORTH_PEN = QPen(QColor(255, 0, 0))
+NORTH_BRUSH = QBrush(QColor(255, 0, 0, 150))
+SOUTH_PEN = QPen(QColor(0, 0, 255))
+SOUTH_BRUSH = QBrush(QColor(0, 0, 255, 150))
+
+# Labels stay upright, only the rest of the rose turns with the heading
+COMPASS_DIAL = DialSpec(0.8, (
+    Ring(1, DIAL_BRUSH, gradient="bezel"),
+    Rose("heading", (
+        Ticks(GRADUATION_TICKS, 0.85, 0.9, GRADUATION_PEN),
+        TickShapes(CARDINAL_TICKS, ((-0.02, 0.9), (-0.01, 0.8), (0.01, 0.8), (0.02, 0.9)),
+                   GRADUATION_PEN, GRADUATION_BRUSH),
+        Labels(LABEL_TICKS, tuple(DEGREE_LABELS), 1.2, 16, -10, 0.04, GRADUATION_PEN),
+        Labels(CARDINAL_TICKS, tuple(CARDINAL_NAMES), 0.7, 16, -8, 0.04, GRADUATION_PEN),
+        Needle(declinationToAngle(360), 0.6, 0.1, 1, NORTH_PEN, NORTH_BRUSH),
+        Needle(declinationToAngle(180), 0.6, 0.1, 1, SOUTH_PEN, SOUTH_BRUSH),
+    )),
+    # Internal disk
+    Ring(0.1, DIAL_BRUSH, gradient="bezel"),
+))
+
+
+class CompassModel:
+    # Heading shown by a compass, independent of any widget; without a __dict__ an instance stays tiny
+    __slots__ = ("__heading", "__displayedHeading", "__animated")
+
+    def __init__(self, heading: float = 0.0, animated: bool = True):
+        # Target heading and heading currently drawn, in degrees
+        self.__heading = heading % 360
+        self.__displayedHeading = self.__heading
+        self.__animated = animated
+
+    def heading(self) -> float:
+        return self.__heading
+
+    def displayedHeading(self) -> float:
+        return self.__displayedHeading
+
+    def isAnimated(self) -> bool:
+        return self.__animated
+
+    # Setters return True if the target or the drawn heading changed
+
+    def setHeading(self, degrees: float) -> bool:
+        target = degrees % 360
+        if target == self.__heading:
+            return False
+        self.__heading = target
+        if not self.__animated:
+            self.__displayedHeading = target
+        return True
+
+    def setAnimated(self, value: bool) -> bool:
+        self.__animated = value
+        if value or self.__displayedHeading == self.__heading:
+            return False
+        self.__displayedHeading = self.__heading
+        return True
+
+    def step(self, elapsed: float) -> bool:
+        # Moves the drawn heading towards the target, returns False once it has been reached
+        difference = shortestArc(self.__displayedHeading, self.__heading)
+        if abs(difference) <= SETTLE_THRESHOLD:
+            self.__displayedHeading = self.__heading
+            return False
+
+        # Exponential easing, independent of the timer rate
+        step = difference * (1 - math.exp(-elapsed / ANIMATION_TIME_CONSTANT))
+        self.__displayedHeading = (self.__displayedHeading + step) % 360
+        return True
+
+
+class CompassWidget(GaugeWidget):
 
     def __init__(self):
         super().__init__()
+        self.__model = CompassModel()
+        # Frame rate cap of this compass only, None follows the shared animation timer
+        self.__maxFps = None
+        self.__antialiasing = True
+        self.__paintStats = None
+
+        # Render plan plus pre-rendered dial ring and hub, the rose itself is replayed from the plan
+        self.__dial = DialRenderer(COMPASS_DIAL)
+
+    def antialiasing(self) -> bool:
+        return self.__antialiasing
+
+    def setAntialiasing(self, value: bool) -> None:
+        if value == self.__antialiasing:
+            return
+        self.__antialiasing = value
+        self.invalidateCache()
+
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
+
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        # Optional paint instrumentation, disabled by default
+        self.__paintStats = stats
+
+    def model(self) -> CompassModel:
+        return self.__model
+
+    def heading(self) -> float:
+        return self.__model.heading()
+
+    def displayedHeading(self) -> float:
+        return self.__model.displayedHeading()
+
+    def isAnimated(self) -> bool:
+        return self.__model.isAnimated()
+
+    def setAnimated(self, value: bool) -> None:
+        self.__model.setAnimated(value)
+        if not value:
+            AnimationDriver.instance().stop(self)
+            self.update()
+
+    def maxFps(self) -> Optional[float]:
+        return self.__maxFps
+
+    def setMaxFps(self, fps: Optional[float]) -> None:
+        # Caps this compass only: the shared timer skips frames for it, other gauges keep their rate
+        if fps is not None and fps <= 0:
+            raise ValueError("maxFps must be positive")
+        self.__maxFps = fps
+        driver = AnimationDriver.instance()
+        if driver.isAnimating(self):
+            driver.start(self, self.__animate, fps)
+
+    @Slot(float)
+    def setHeading(self, degrees: float) -> None:
+        # Can be fed at any rate: only the latest target is kept and the rose catches up at the timer rate
+        if not self.__model.setHeading(degrees):
+            if self.__paintStats is not None:
+                self.__paintStats.markDropped()
+            return
+
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+
+        if not self.__model.isAnimated():
+            self.update()
+        else:
+            AnimationDriver.instance().start(self, self.__animate, self.__maxFps)
 
-        self.angleRandom = 0
-        print(self.angleRandom)
-        self.timer = QTimer()
+    def updateCompass(self):
+        # Random heading, used by the example window
+        self.setHeading(random.randint(0, 360))
 
-        self.timer.timeout.connect(self.updateCompass())
-        self.timer.start(1000)
+    def renderStrategy(self) -> RenderStrategy:
+        return self.__dial.strategy()
 
-    def updateCompass(self):
-        self.angleRandom = math.radians(random.randint(0, 360))
+    def setRenderStrategy(self, strategy: RenderStrategy) -> None:
+        # Pixmap: fastest blit; Picture: display list replayed at scale, constant memory
+        self.__dial.setStrategy(strategy)
+        self.update()
+
+    def invalidateCache(self) -> None:
+        self.__dial.invalidate()
         self.update()
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        super().paintEvent(event)
-
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # We draw the compass with a gradient around it
-        radius = 0.8 * (min(self.width(), self.height()) / 2)
-
-        centerX = int(self.width() / 2)
-        centerY = int(self.height() / 2)
-
-        linearGradient = QLinearGradient(QPointF(0, 0), QPointF(0, radius * 2))
-        linearGradient.setColorAt(0, QColor(0xE0, 0xE0, 0xE0))
-        linearGradient.setColorAt(0.5, QColor(0x6E, 0x77, 0x74))
-        linearGradient.setColorAt(0.51, QColor(0x0a, 0x0e, 0x0a))
-        linearGradient.setColorAt(1, QColor(0x0a, 0x08, 0x09))
-
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius, radius)
-
-        # We're about to draw graduations on the compass
-        font = painter.font()
-        font.setPointSize(16)
-        painter.setFont(font)
-
-        angle = (-math.pi / 2) + self.angleRandom
-        # randomAngle = random.randint(0, 360)
-        declination = 0
-        for step in range(12 * 3):
-            angle += math.pi / 18
-            declination += 10
-
-            painter.setPen(Qt.white)
-            painter.setBrush(Qt.white)
-
-            if declination % 9 == 0:
-                # drawing the graduations of four cardinal points
-                painter.drawPolygon([
-                    QPointF(centerX + math.cos(angle - 0.02) * radius * 0.9,
-                            centerY + math.sin(angle - 0.02) * radius * 0.9),
-                    QPointF(centerX + math.cos(angle - 0.01) * radius * 0.8,
-                            centerY + math.sin(angle - 0.01) * radius * 0.8),
-                    QPointF(centerX + math.cos(angle + 0.01) * radius * 0.8,
-                            centerY + math.sin(angle + 0.01) * radius * 0.8),
-                    QPointF(centerX + math.cos(angle + 0.02) * radius * 0.9,
-                            centerY + math.sin(angle + 0.02) * radius * 0.9)
-                ])
-            else:
-                # drawing classic compass graduations
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.85,
-                            centerY + math.sin(angle) * radius * 0.85),
-                    QPointF(centerX + math.cos(angle) * radius * 0.9,
-                            centerY + math.sin(angle) * radius * 0.9)
-                )
-
-            if declination % 3 == 0:
-                # marking of graduations numbers
-                delta = radius * 0.04
-                painter.drawText(int(centerX + math.cos(angle) * radius * 1.2) - 10,
-                                 int(centerY + math.sin(angle) * radius * 1.2 + delta),
-                                 str(0 if declination == 360 else declination)
-                                 )
-
-            if declination % 9 == 0:
-                # marking of the four cardinal points graduations
-                delta = radius * 0.04
-                painter.drawText(int(centerX + math.cos(angle) * radius * 0.7) - 8,
-                                 int(centerY + math.sin(angle) * radius * 0.7 + delta),
-                                 str([key for key, value in cardinalPoint.items() if declination == value][0])
-                                 )
-
-            if declination == 360:
-                # Drawing of the north arrow
-                painter.setPen(QColor(255, 0, 0))
-                painter.setBrush(QColor(255, 0, 0, 150))
-
-                painter.drawPolygon([
-                    QPointF(centerX + math.cos(angle) * radius * 0.6, centerY + math.sin(angle) * radius * 0.6),
-                    QPointF(centerX + math.cos(angle - 1) * radius * 0.1,
-                            centerY + math.sin(angle - 1) * radius * 0.1),
-                    QPointF(centerX + math.cos(angle + 1) * radius * 0.1,
-                            centerY + math.sin(angle + 1) * radius * 0.1)
-                ])
-
-            if declination == 180:
-                # Drawing of the south arrow
-                painter.setPen(QColor(0, 0, 255))
-                painter.setBrush(QColor(0, 0, 255, 150))
-
-                painter.drawPolygon([
-                    QPointF(centerX + math.cos(angle) * radius * 0.6, centerY + math.sin(angle) * radius * 0.6),
-                    QPointF(centerX + math.cos(angle - 1) * radius * 0.1,
-                            centerY + math.sin(angle - 1) * radius * 0.1),
-                    QPointF(centerX + math.cos(angle + 1) * radius * 0.1,
-                            centerY + math.sin(angle + 1) * radius * 0.1)
-                ])
-
-        # we draw the internal disk
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius * 0.1, radius * 0.1)
+    def changeEvent(self, event: QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange, QEvent.FontChange):
+            self.invalidateCache()
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        AnimationDriver.instance().stop(self)
+
+    def __animate(self, elapsed: float) -> bool:
+        # Returns False once the rose has reached its target, which stops the animation
+        moving = self.__model.step(elapsed)
+        self.update()
+        return moving
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        dpr = paintRatio(painter)
+        self.__dial.paint(painter, self.width(), self.height(), dpr, self.__antialiasing,
+                          self.font(), {"heading": self.__model.displayedHeading()}, self.detail())
 
 
 class MainWindow(QMainWindow):
@@ -143,6 +238,11 @@ class MainWindow(QMainWindow):
         compass = CompassWidget()
         self.setCentralWidget(compass)
 
+        # a new random heading every second, the compass animates towards it
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(compass.updateCompass)
+        self.timer.start(1000)
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,233 @@
+import math
+import sys
+from typing import List, Optional
+
+from PySide6.QtCore import QEvent, QRect, QTimer
+from PySide6.QtGui import QPainter, QRegion, QResizeEvent
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+from .Animation import AnimationDriver, NeedleDynamics
+from .DialSpec import DialRenderer, RenderStrategy
+from .GaugeWidget import GaugeWidget, RenderBackend, paintRatio
+from .PaintStats import PaintStats
+from .Speedometer import MAX_SPEED, SPEED_DIAL, SpeedModel, speedValues
+from .UpdateScheduler import UpdateScheduler
+
+
+class DashboardWidget(GaugeWidget):
+    # Grille de compteurs peinte par un seul widget : le cadran commun est tamponné dans chaque case
+
+    def __init__(self, count: int = 0, columns: Optional[int] = None):
+        super().__init__()
+        self.__models: List[SpeedModel] = [SpeedModel() for _ in range(count)]
+        self.__columns = columns
+        self.__antialiasing = True
+
+        self.__scheduler = UpdateScheduler(self)
+        self.__paintStats = None
+
+        # Un seul cadran, tamponné dans chaque case
+        self.__dial = DialRenderer(SPEED_DIAL)
+
+        # Une aiguille amortie par compteur, seulement en mode animé
+        self.__needles: Optional[List[NeedleDynamics]] = None
+
+    def updateScheduler(self) -> UpdateScheduler:
+        return self.__scheduler
+
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
+
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        self.__paintStats = stats
+
+    def gaugeCount(self) -> int:
+        return len(self.__models)
+
+    def model(self, index: int) -> SpeedModel:
+        return self.__models[index]
+
+    def addGauge(self, model: Optional[SpeedModel] = None) -> int:
+        self.__models.append(model if model is not None else SpeedModel())
+        if self.__needles is not None:
+            self.__needles.append(NeedleDynamics(self.__models[-1].speed()))
+        # La grille change de forme : toutes les cases bougent
+        self.update()
+        return len(self.__models) - 1
+
+    def columns(self) -> int:
+        # Par défaut, une grille aussi carrée que possible
+        if self.__columns is not None:
+            return self.__columns
+        return max(1, math.ceil(math.sqrt(len(self.__models))))
+
+    def setColumns(self, columns: Optional[int]) -> None:
+        if columns is not None and columns <= 0:
+            raise ValueError("columns must be positive")
+        self.__columns = columns
+        self.update()
+
+    def rows(self) -> int:
+        return max(1, math.ceil(len(self.__models) / self.columns()))
+
+    def cellRect(self, index: int) -> QRect:
+        columns = self.columns()
+        width = self.width() // columns
+        height = self.height() // self.rows()
+        return QRect(index % columns * width, index // columns * height, width, height)
+
+    def setSpeed(self, index: int, speed: int) -> None:
+        self.__changed(index, self.__models[index].setSpeed(speed))
+
+    def setMaxSpeed(self, index: int, speed: int) -> None:
+        self.__changed(index, self.__models[index].setMaxSpeed(speed))
+
+    def setLimiter(self, index: int, value: bool) -> None:
+        self.__changed(index, self.__models[index].setLimiter(value))
+
+    def isAnimated(self) -> bool:
+        return self.__needles is not None
+
+    def setAnimated(self, value: bool) -> None:
+        if value == self.isAnimated():
+            return
+
+        if value:
+            self.__needles = [NeedleDynamics(model.speed()) for model in self.__models]
+        else:
+            self.__needles = None
+            AnimationDriver.instance().stop(self)
+            self.update()
+
+    def displayedSpeed(self, index: int) -> float:
+        if self.__needles is not None:
+            return self.__needles[index].value
+        return self.__models[index].speed()
+
+    def __changed(self, index: int, changed: bool) -> None:
+        # Seule la case du compteur modifié est à repeindre
+        if not changed:
+            if self.__paintStats is not None:
+                self.__paintStats.markDropped()
+            return
+
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+
+        if self.__needles is not None and self.__needles[index].target != self.__models[index].speed():
+            self.__needles[index].target = self.__models[index].speed()
+            AnimationDriver.instance().start(self, self.__animate)
+        self.__scheduler.requestUpdate(self.cellRect(index))
+
+    def __animate(self, elapsed: float) -> bool:
+        # Toutes les aiguilles du tableau avancent au même pas, seules les cases en mouvement sont repeintes
+        moving = False
+        for index, needle in enumerate(self.__needles):
+            if needle.isSettled():
+                continue
+            moving = needle.step(elapsed) or moving
+            self.__scheduler.requestUpdate(self.cellRect(index))
+        return moving
+
+    def antialiasing(self) -> bool:
+        return self.__antialiasing
+
+    def setAntialiasing(self, value: bool) -> None:
+        if value == self.__antialiasing:
+            return
+        self.__antialiasing = value
+        self.update()
+
+    def renderStrategy(self) -> RenderStrategy:
+        return self.__dial.strategy()
+
+    def setRenderStrategy(self, strategy: RenderStrategy) -> None:
+        self.__dial.setStrategy(strategy)
+        self.update()
+
+    def changeEvent(self, event: QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange, QEvent.FontChange):
+            self.update()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self.update()
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        if not self.__models:
+            self.__scheduler.paintPerformed()
+            return
+
+        columns = self.columns()
+        width = self.width() // columns
+        height = self.height() // self.rows()
+        if width <= 0 or height <= 0:
+            self.__scheduler.paintPerformed()
+            return
+
+        # On ne parcourt que les lignes et colonnes touchées par la zone à repeindre
+        bounds = region.boundingRect()
+        firstRow = max(0, bounds.top() // height)
+        lastRow = min(self.rows() - 1, bounds.bottom() // height)
+        firstColumn = max(0, bounds.left() // width)
+        lastColumn = min(columns - 1, bounds.right() // width)
+
+        # Ratio de la cible de peinture, qui peut être une image HiDPI rendue par render()
+        dpr = paintRatio(painter)
+        font = self.font()
+        # Un seul niveau pour tout le tableau : le budget porte sur la peinture entière
+        detail = self.detail()
+
+        for row in range(firstRow, lastRow + 1):
+            for column in range(firstColumn, lastColumn + 1):
+                index = row * columns + column
+                if index >= len(self.__models):
+                    break
+
+                x = column * width
+                y = row * height
+                if not region.intersects(QRect(x, y, width, height)):
+                    continue
+
+                speed = self.__needles[index].value if self.__needles is not None else None
+                painter.translate(x, y)
+                self.__dial.paint(painter, width, height, dpr, self.__antialiasing, font,
+                                  speedValues(self.__models[index], speed), detail)
+                painter.translate(-x, -y)
+
+        self.__scheduler.paintPerformed()
+
+
+class MainWindow(QMainWindow):
+
+    def __init__(self, count: int = 64, backend: RenderBackend = RenderBackend.Raster):
+        super().__init__()
+        self.setWindowTitle("Example of a dashboard of speedometers")
+        self.resize(960, 960)
+
+        self.dashboard = DashboardWidget(count)
+        self.dashboard.setBackend(backend)
+        self.setCentralWidget(self.dashboard)
+
+        self.__step = 0
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.updateGauges)
+        self.timer.start(50)
+
+    def updateGauges(self) -> None:
+        # Chaque compteur balaie la plage de vitesses avec son propre déphasage
+        self.__step += 1
+        for index in range(self.dashboard.gaugeCount()):
+            value = (self.__step * (index % 7 + 1)) % (2 * MAX_SPEED)
+            self.dashboard.setSpeed(index, value if value <= MAX_SPEED else 2 * MAX_SPEED - value)
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+
+    # --opengl peint le tableau de bord sur une surface OpenGL, en restant en raster si elle n'est pas disponible
+    window = MainWindow(backend=RenderBackend.OpenGL if "--opengl" in sys.argv else RenderBackend.Raster)
+    window.show()
+
+    sys.exit(app.exec())
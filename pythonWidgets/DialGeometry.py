@@ -0,0 +1,132 @@
+import math
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from PySide6.QtCore import QLineF, QPointF
+from PySide6.QtGui import QPainterPath, QPolygonF
+
+# NumPy est optionnel : il vectorise le calcul des tables, sinon on reste en Python pur
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Nombre de jeux de coordonnées (centre, rayon) conservés par fonction
+SCALED_CACHE_SIZE = 256
+
+
+class TickTable:
+    # Cosinus et sinus d'un ensemble de graduations, calculés une seule fois sur le cercle unité
+
+    def __init__(self, angles: Sequence[float]):
+        self.angles = tuple(angles)
+
+        if numpy is not None:
+            values = numpy.asarray(self.angles, dtype=float)
+            self.cos = numpy.cos(values)
+            self.sin = numpy.sin(values)
+        else:
+            self.cos = tuple(math.cos(angle) for angle in self.angles)
+            self.sin = tuple(math.sin(angle) for angle in self.angles)
+
+        # Plus petit écart angulaire entre deux graduations voisines, pour le niveau de détail
+        ordered = sorted(self.angles)
+        self.spacing = min((b - a for a, b in zip(ordered, ordered[1:])), default=2 * math.pi)
+
+    def __len__(self) -> int:
+        return len(self.angles)
+
+    def unit(self, offset: float = 0.0) -> Tuple[Sequence[float], Sequence[float]]:
+        # Une rotation de toute la table ne coûte que deux appels trigonométriques
+        if offset == 0:
+            return self.cos, self.sin
+
+        c = math.cos(offset)
+        s = math.sin(offset)
+        if numpy is not None:
+            return self.cos * c - self.sin * s, self.sin * c + self.cos * s
+
+        return (tuple(x * c - y * s for x, y in zip(self.cos, self.sin)),
+                tuple(y * c + x * s for x, y in zip(self.cos, self.sin)))
+
+    def points(self, centerX: float, centerY: float, radius: float, offset: float = 0.0) -> List[QPointF]:
+        # Une table tournée change à chaque image : on ne la garde pas en cache
+        if offset:
+            return _points.__wrapped__(self, centerX, centerY, radius, offset)
+        return _points(self, centerX, centerY, radius, offset)
+
+    def lines(self, centerX: float, centerY: float, inner: float, outer: float,
+              offset: float = 0.0) -> List[QLineF]:
+        if offset:
+            return _lines.__wrapped__(self, centerX, centerY, inner, outer, offset)
+        return _lines(self, centerX, centerY, inner, outer, offset)
+
+    def polygons(self, centerX: float, centerY: float, corners: Tuple[Tuple[float, float], ...],
+                 offset: float = 0.0) -> List[QPolygonF]:
+        # corners : suite de (décalage angulaire, rayon) décrivant le polygone de chaque graduation
+        if offset:
+            return _polygons.__wrapped__(self, centerX, centerY, corners, offset)
+        return _polygons(self, centerX, centerY, corners, offset)
+
+    def path(self, centerX: float, centerY: float, corners: Tuple[Tuple[float, float], ...],
+             offset: float = 0.0) -> QPainterPath:
+        # Tous les polygones réunis pour être remplis en un seul drawPath
+        if offset:
+            return _path.__wrapped__(self, centerX, centerY, corners, offset)
+        return _path(self, centerX, centerY, corners, offset)
+
+
+def _scaled(table: TickTable, centerX: float, centerY: float, radius: float,
+            offset: float) -> Tuple[Sequence[float], Sequence[float]]:
+    cos, sin = table.unit(offset)
+    if numpy is not None:
+        return (centerX + cos * radius).tolist(), (centerY + sin * radius).tolist()
+
+    return ([centerX + x * radius for x in cos],
+            [centerY + y * radius for y in sin])
+
+
+@lru_cache(maxsize=SCALED_CACHE_SIZE)
+def _points(table: TickTable, centerX: float, centerY: float, radius: float, offset: float) -> List[QPointF]:
+    xs, ys = _scaled(table, centerX, centerY, radius, offset)
+    return [QPointF(x, y) for x, y in zip(xs, ys)]
+
+
+@lru_cache(maxsize=SCALED_CACHE_SIZE)
+def _lines(table: TickTable, centerX: float, centerY: float, inner: float, outer: float,
+           offset: float) -> List[QLineF]:
+    x1, y1 = _scaled(table, centerX, centerY, inner, offset)
+    x2, y2 = _scaled(table, centerX, centerY, outer, offset)
+    return [QLineF(a, b, c, d) for a, b, c, d in zip(x1, y1, x2, y2)]
+
+
+@lru_cache(maxsize=SCALED_CACHE_SIZE)
+def _polygons(table: TickTable, centerX: float, centerY: float, corners: Tuple[Tuple[float, float], ...],
+              offset: float) -> List[QPolygonF]:
+    scaled = [_scaled(table, centerX, centerY, radius, offset + delta) for delta, radius in corners]
+    return [QPolygonF([QPointF(xs[i], ys[i]) for xs, ys in scaled]) for i in range(len(table))]
+
+
+@lru_cache(maxsize=SCALED_CACHE_SIZE)
+def _path(table: TickTable, centerX: float, centerY: float, corners: Tuple[Tuple[float, float], ...],
+          offset: float) -> QPainterPath:
+    path = QPainterPath()
+    for polygon in table.polygons(centerX, centerY, corners, offset):
+        path.addPolygon(polygon)
+        path.closeSubpath()
+    return path
+
+
+def needle(centerX: float, centerY: float, angle: float, tip: float, base: float,
+           halfAngle: float) -> List[QPointF]:
+    # Triangle d'aiguille : pointe à `tip`, base à `base` de part et d'autre de l'angle
+    c = math.cos(angle)
+    s = math.sin(angle)
+    dc = math.cos(halfAngle)
+    ds = math.sin(halfAngle)
+
+    return [
+        QPointF(centerX + c * tip, centerY + s * tip),
+        QPointF(centerX + (c * dc + s * ds) * base, centerY + (s * dc - c * ds) * base),
+        QPointF(centerX + (c * dc - s * ds) * base, centerY + (s * dc + c * ds) * base)
+    ]
@@ -0,0 +1,566 @@
+import math
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from PySide6.QtCore import QPoint, QPointF, Qt
+from PySide6.QtGui import QBrush, QFont, QPainter, QPen, QPicture, QPixmap
+
+from .DialGeometry import TickTable, needle
+from .LabelCache import labelCache
+from .Theme import DEFAULT_THEME, resources
+
+# Nombre de tailles compilées conservées par cadran, et de jeux de calques par taille
+PLAN_CACHE_SIZE = 32
+LAYER_CACHE_SIZE = 4
+
+# Taille du widget carré pour laquelle les listes d'affichage sont enregistrées
+REFERENCE_SIZE = 400
+
+# Valeurs courantes des canaux d'un cadran, un canal absent n'est pas dessiné.
+# Le canal d'une trace porte une suite de valeurs, None là où il n'y en a pas
+Values = Dict[str, Union[float, Sequence[Optional[float]]]]
+
+# Seuils du niveau de détail Reduced, doublés au niveau Minimal :
+# écart en pixels entre deux graduations voisines,
+MIN_TICK_SPACING = 3
+# écart entre deux textes voisins, en fois leur taille de police par caractère du plus long,
+MIN_LABEL_SPACING = 0.4
+# et rayon du cadran sous lequel une légende est omise, en fois sa taille de police
+MIN_CAPTION_RADIUS = 3.0
+
+# Rayon en pixels sous lequel, au niveau Reduced, les parties animées sont dessinées sans antialiasing ;
+# il ne lisse plus qu'un ou deux pixels par aiguille. Au niveau Minimal, elles n'en ont jamais
+MIN_ANTIALIASING_RADIUS = 50
+
+
+class RenderStrategy(Enum):
+    # Fond et premier plan rendus en pixmap pour chaque taille : le blit le plus rapide,
+    # mais une mémoire proportionnelle aux tailles affichées
+    Pixmap = 0
+    # Liste d'affichage QPicture enregistrée une seule fois à REFERENCE_SIZE et rejouée à l'échelle :
+    # mémoire constante, au prix d'un rejeu vectoriel à chaque peinture. Les épaisseurs de trait et
+    # les textes suivent l'échelle, et le cadran reste carré
+    Picture = 1
+
+
+class Detail(Enum):
+    # Tout le cadran, quelle que soit sa taille
+    Full = 0
+    # Graduations et textes trop serrés pour le rayon affiché omis, antialiasing des parties animées coupé
+    # sur les petits cadrans
+    Reduced = 1
+    # Seuils doublés, et parties animées dessinées sans antialiasing
+    Minimal = 2
+
+
+class Scale(NamedTuple):
+    # Plage de valeurs répartie sur un arc, angles en radians et balayage en degrés
+    minimum: float
+    maximum: float
+    start: float
+    sweep: float
+
+    def angle(self, value: float) -> float:
+        return self.start + math.radians((value - self.minimum) / (self.maximum - self.minimum) * self.sweep)
+
+    def table(self, values: Sequence[float]) -> TickTable:
+        return TickTable([self.angle(value) for value in values])
+
+
+# Éléments d'un cadran ; les longueurs sont des fractions du rayon du cadran
+
+class Ring(NamedTuple):
+    # Disque cerclé, par un dégradé du thème ou un stylo
+    radius: float
+    brush: QBrush
+    gradient: Optional[str] = None
+    pen: Optional[QPen] = None
+    width: float = 8
+
+
+class Ticks(NamedTuple):
+    # Un trait par angle de la table, entre `inner` et `outer`
+    table: TickTable
+    inner: float
+    outer: float
+    pen: QPen
+
+
+class TickShapes(NamedTuple):
+    # Un polygone par angle : suite de (décalage angulaire, fraction du rayon)
+    table: TickTable
+    corners: Tuple[Tuple[float, float], ...]
+    pen: QPen
+    brush: QBrush
+
+
+class Labels(NamedTuple):
+    # Un texte par angle ; `dx` en pixels, `dy` en fraction du rayon, ajoutés au point d'ancrage
+    table: TickTable
+    texts: Tuple[str, ...]
+    radius: float
+    pointSize: int
+    dx: int
+    dy: float
+    pen: QPen
+
+
+class Caption(NamedTuple):
+    # Texte fixe, centré en x à `dx` près, ligne de base à `y` fois la hauteur du widget
+    text: str
+    dx: int
+    y: float
+    pointSize: int
+    pen: QPen
+
+
+class Needle(NamedTuple):
+    # Aiguille triangulaire ; sans canal, `angle` est un angle fixe en radians
+    angle: object
+    tip: float
+    base: float
+    halfAngle: float
+    pen: QPen
+    brush: QBrush
+    channel: Optional[str] = None
+
+
+class Hand(NamedTuple):
+    # Aiguille en trait simple, du centre jusqu'à `length`
+    channel: str
+    angle: Callable[[float], float]
+    length: float
+    pen: QPen
+
+
+class Trace(NamedTuple):
+    # Historique du canal en ligne brisée : chaque valeur à son angle, de `inner` (la plus ancienne)
+    # à `outer` (la plus récente)
+    channel: str
+    angle: Callable[[float], float]
+    inner: float
+    outer: float
+    pen: QPen
+
+
+class Rose(NamedTuple):
+    # Éléments tournant de -valeur degrés autour du centre ; les textes restent droits
+    channel: str
+    elements: Tuple
+
+
+Step = Callable[[QPainter, Values], None]
+
+
+class RenderPlan:
+    # Primitives précalculées pour une taille donnée : fond et premier plan fixes, partie dynamique entre les deux
+
+    def __init__(self, background: List[Step], dynamic: List[Step], foreground: List[Step],
+                 width: int, height: int):
+        self.background = background
+        self.dynamic = dynamic
+        self.foreground = foreground
+        self.width = width
+        self.height = height
+        self.__layers = OrderedDict()
+
+    def paint(self, painter: QPainter, values: Values) -> None:
+        self.paintBackground(painter)
+        self.paintDynamic(painter, values)
+        self.paintForeground(painter)
+
+    def paintBackground(self, painter: QPainter) -> None:
+        for step in self.background:
+            step(painter, {})
+
+    def paintDynamic(self, painter: QPainter, values: Values) -> None:
+        for step in self.dynamic:
+            step(painter, values)
+
+    def paintForeground(self, painter: QPainter) -> None:
+        for step in self.foreground:
+            step(painter, {})
+
+    def layers(self, dpr: float, antialiasing: bool, font: QFont) -> Tuple[QPixmap, Optional[QPixmap]]:
+        # Fond et premier plan rendus une fois, partagés par tous les widgets de cette taille
+        key = (dpr, antialiasing, font.key())
+        layers = self.__layers.get(key)
+        if layers is not None:
+            self.__layers.move_to_end(key)
+            return layers
+
+        background = self.__record(self.paintBackground, dpr, antialiasing, font)
+        foreground = self.__record(self.paintForeground, dpr, antialiasing, font) if self.foreground else None
+
+        layers = self.__layers[key] = (background, foreground)
+        while len(self.__layers) > LAYER_CACHE_SIZE:
+            self.__layers.popitem(last=False)
+        return layers
+
+    def __record(self, paint: Callable[[QPainter], None], dpr: float, antialiasing: bool, font: QFont) -> QPixmap:
+        pixmap = QPixmap(int(self.width * dpr), int(self.height * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+        painter.setFont(font)
+        paint(painter)
+        painter.end()
+        return pixmap
+
+
+class DialSpec:
+    # Description déclarative d'un cadran, compilée une fois par taille en RenderPlan
+
+    def __init__(self, radius: float, elements: Sequence, theme=DEFAULT_THEME):
+        # `radius` : rayon du cadran en fraction de la demi-largeur (ou hauteur) du widget
+        self.radius = radius
+        self.elements = tuple(elements)
+        self.theme = theme
+        self.__plans = OrderedDict()
+        self.__pictures = OrderedDict()
+
+    def geometry(self, width: int, height: int) -> Tuple[int, int, float]:
+        return int(width / 2), int(height / 2), self.radius * (min(width, height) / 2)
+
+    def visibility(self, width: int, height: int, detail: Detail = Detail.Full) -> tuple:
+        # Un booléen par élément, un tuple de booléens pour les éléments d'une rose
+        radius = self.geometry(width, height)[2]
+        return tuple(_visible(element, radius, detail) for element in self.elements)
+
+    def antialiased(self, width: int, height: int, detail: Detail = Detail.Full) -> bool:
+        # Antialiasing des parties animées, choisi selon le rayon affiché
+        if detail is Detail.Full:
+            return True
+        if detail is Detail.Minimal:
+            return False
+        return self.geometry(width, height)[2] >= MIN_ANTIALIASING_RADIUS
+
+    def compile(self, width: int, height: int, detail: Detail = Detail.Full) -> RenderPlan:
+        return self.__plan(width, height, self.visibility(width, height, detail))
+
+    def __plan(self, width: int, height: int, visibility: tuple) -> RenderPlan:
+        key = (width, height, visibility)
+        plan = self.__plans.get(key)
+        if plan is not None:
+            self.__plans.move_to_end(key)
+            return plan
+
+        centerX, centerY, radius = self.geometry(width, height)
+        steps = [(_isDynamic(element), _compile(element, self.theme, centerX, centerY, radius, height))
+                 for element in _filter(self.elements, visibility)]
+
+        # Les éléments fixes avant la première partie dynamique forment le fond, ceux après le premier plan
+        dynamicIndexes = [index for index, (dynamic, _) in enumerate(steps) if dynamic]
+        first = dynamicIndexes[0] if dynamicIndexes else len(steps)
+        last = dynamicIndexes[-1] + 1 if dynamicIndexes else len(steps)
+        plan = RenderPlan([step for _, step in steps[:first]], [step for _, step in steps[first:last]],
+                          [step for _, step in steps[last:]], width, height)
+
+        self.__plans[key] = plan
+        while len(self.__plans) > PLAN_CACHE_SIZE:
+            self.__plans.popitem(last=False)
+        return plan
+
+    def pictures(self, antialiasing: bool, font: QFont,
+                 visibility: Optional[tuple] = None) -> Tuple[QPicture, Optional[QPicture]]:
+        # Fond et premier plan enregistrés une fois pour toutes les tailles ; `visibility` vient de la taille affichée
+        if visibility is None:
+            visibility = self.visibility(REFERENCE_SIZE, REFERENCE_SIZE)
+        key = (antialiasing, font.key(), visibility)
+        pictures = self.__pictures.get(key)
+        if pictures is not None:
+            self.__pictures.move_to_end(key)
+            return pictures
+
+        plan = self.__plan(REFERENCE_SIZE, REFERENCE_SIZE, visibility)
+        background = _record(plan.paintBackground, antialiasing, font)
+        foreground = _record(plan.paintForeground, antialiasing, font) if plan.foreground else None
+
+        pictures = self.__pictures[key] = (background, foreground)
+        while len(self.__pictures) > LAYER_CACHE_SIZE:
+            self.__pictures.popitem(last=False)
+        return pictures
+
+    def clear(self) -> None:
+        self.__plans.clear()
+        self.__pictures.clear()
+
+
+class DialRenderer:
+    # Ce qu'un widget garde de son cadran : le plan de sa taille et ses calques selon la stratégie choisie
+    __slots__ = ("__spec", "__strategy", "__key", "__plan", "__layers")
+
+    def __init__(self, spec: DialSpec, strategy: RenderStrategy = RenderStrategy.Pixmap):
+        self.__spec = spec
+        self.__strategy = strategy
+        self.__key = None
+        self.__plan = None
+        self.__layers = None
+
+    def spec(self) -> DialSpec:
+        return self.__spec
+
+    def strategy(self) -> RenderStrategy:
+        return self.__strategy
+
+    def setStrategy(self, strategy: RenderStrategy) -> None:
+        self.__strategy = strategy
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self.__key = None
+        self.__plan = None
+        self.__layers = None
+
+    def paint(self, painter: QPainter, width: int, height: int, dpr: float, antialiasing: bool, font: QFont,
+              values: Values, detail: Detail = Detail.Full) -> None:
+        # Sans antialiasing pour les parties animées, seuls les calques en pixmap, rendus une fois, le gardent
+        if antialiasing and not self.__spec.antialiased(width, height, detail):
+            antialiasing, layerAntialiasing = False, self.__strategy is RenderStrategy.Pixmap
+        else:
+            layerAntialiasing = antialiasing
+
+        key = (width, height, dpr, antialiasing, layerAntialiasing, font.key(), detail)
+        if self.__key != key:
+            visibility = self.__spec.visibility(width, height, detail)
+            self.__plan = self.__spec.compile(width, height, detail)
+            if self.__strategy is RenderStrategy.Picture:
+                self.__layers = self.__spec.pictures(layerAntialiasing, font, visibility)
+            else:
+                self.__layers = self.__plan.layers(dpr, layerAntialiasing, font)
+            self.__key = key
+
+        background, foreground = self.__layers
+        self.__paintLayer(painter, background, width, height)
+        painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+        self.__plan.paintDynamic(painter, values)
+        if foreground is not None:
+            self.__paintLayer(painter, foreground, width, height)
+
+    def __paintLayer(self, painter: QPainter, layer: Union[QPixmap, QPicture], width: int, height: int) -> None:
+        if isinstance(layer, QPixmap):
+            painter.drawPixmap(0, 0, layer)
+            return
+
+        # Le centre de référence est ramené sur celui du widget, à l'échelle de son plus petit côté
+        scale = min(width, height) / REFERENCE_SIZE
+        painter.save()
+        painter.translate(int(width / 2), int(height / 2))
+        painter.scale(scale, scale)
+        painter.translate(-int(REFERENCE_SIZE / 2), -int(REFERENCE_SIZE / 2))
+        painter.drawPicture(0, 0, layer)
+        painter.restore()
+
+
+def _record(paint: Callable[[QPainter], None], antialiasing: bool, font: QFont) -> QPicture:
+    picture = QPicture()
+    painter = QPainter(picture)
+    painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+    painter.setFont(font)
+    paint(painter)
+    painter.end()
+    return picture
+
+
+def _visible(element, radius: float, detail: Detail):
+    if isinstance(element, Rose):
+        return tuple(_visible(child, radius, detail) for child in element.elements)
+    if detail is Detail.Full:
+        return True
+
+    factor = 2 if detail is Detail.Minimal else 1
+    if isinstance(element, Ticks):
+        return radius * element.outer * element.table.spacing >= MIN_TICK_SPACING * factor
+    if isinstance(element, TickShapes):
+        outer = max(fraction for _, fraction in element.corners)
+        return radius * outer * element.table.spacing >= MIN_TICK_SPACING * factor
+    if isinstance(element, Labels):
+        longest = max(len(text) for text in element.texts)
+        return radius * element.radius * element.table.spacing >= MIN_LABEL_SPACING * factor * element.pointSize * longest
+    if isinstance(element, Caption):
+        return radius >= MIN_CAPTION_RADIUS * factor * element.pointSize
+    if isinstance(element, Trace):
+        # Décoration, omise dès que le budget de peinture est dépassé au point d'atteindre Minimal
+        return detail is not Detail.Minimal
+    # Disques et aiguilles sont toujours dessinés
+    return True
+
+
+def _filter(elements: Sequence, visibility: tuple) -> list:
+    kept = []
+    for element, visible in zip(elements, visibility):
+        if isinstance(element, Rose):
+            kept.append(Rose(element.channel, tuple(_filter(element.elements, visible))))
+        elif visible:
+            kept.append(element)
+    return kept
+
+
+def _isDynamic(element) -> bool:
+    return isinstance(element, (Rose, Hand, Trace)) or (isinstance(element, Needle) and element.channel is not None)
+
+
+def _setFont(painter: QPainter, pointSize: int) -> None:
+    font = painter.font()
+    font.setPointSize(pointSize)
+    painter.setFont(font)
+
+
+def _compile(element, theme, centerX: float, centerY: float, radius: float, height: int) -> Step:
+    if isinstance(element, Ring):
+        pen = element.pen
+        if element.gradient is not None:
+            pen = resources.gradientPen(theme, element.gradient, radius, element.width)
+        center = QPoint(centerX, centerY)
+        size = radius * element.radius
+
+        def ring(painter: QPainter, values: Values) -> None:
+            painter.setPen(pen)
+            painter.setBrush(element.brush)
+            painter.drawEllipse(center, size, size)
+        return ring
+
+    if isinstance(element, Ticks):
+        lines = element.table.lines(centerX, centerY, radius * element.inner, radius * element.outer)
+
+        def ticks(painter: QPainter, values: Values) -> None:
+            painter.setPen(element.pen)
+            painter.drawLines(lines)
+        return ticks
+
+    if isinstance(element, TickShapes):
+        path = element.table.path(centerX, centerY,
+                                  tuple((delta, radius * fraction) for delta, fraction in element.corners))
+
+        def shapes(painter: QPainter, values: Values) -> None:
+            painter.setPen(element.pen)
+            painter.setBrush(element.brush)
+            painter.drawPath(path)
+        return shapes
+
+    if isinstance(element, Labels):
+        delta = radius * element.dy
+        anchors = [(int(point.x()) + element.dx, int(point.y() + delta), text)
+                   for text, point in zip(element.texts, element.table.points(centerX, centerY,
+                                                                              radius * element.radius))]
+
+        def labels(painter: QPainter, values: Values) -> None:
+            _setFont(painter, element.pointSize)
+            painter.setPen(element.pen)
+            for x, y, text in anchors:
+                labelCache.drawText(painter, x, y, text)
+        return labels
+
+    if isinstance(element, Caption):
+        x = centerX + element.dx
+        y = int(height * element.y)
+
+        def caption(painter: QPainter, values: Values) -> None:
+            _setFont(painter, element.pointSize)
+            painter.setPen(element.pen)
+            labelCache.drawText(painter, x, y, element.text)
+        return caption
+
+    if isinstance(element, Needle):
+        tip = radius * element.tip
+        base = radius * element.base
+
+        if element.channel is None:
+            polygon = needle(centerX, centerY, element.angle, tip, base, element.halfAngle)
+
+            def fixedNeedle(painter: QPainter, values: Values) -> None:
+                painter.setPen(element.pen)
+                painter.setBrush(element.brush)
+                painter.drawPolygon(polygon)
+            return fixedNeedle
+
+        def movingNeedle(painter: QPainter, values: Values) -> None:
+            value = values.get(element.channel)
+            if value is None:
+                return
+            painter.setPen(element.pen)
+            painter.setBrush(element.brush)
+            painter.drawPolygon(needle(centerX, centerY, element.angle(value), tip, base, element.halfAngle))
+        return movingNeedle
+
+    if isinstance(element, Hand):
+        length = radius * element.length
+
+        def hand(painter: QPainter, values: Values) -> None:
+            value = values.get(element.channel)
+            if value is None:
+                return
+            angle = element.angle(value)
+            painter.setPen(element.pen)
+            painter.drawLine(centerX, centerY, int(centerX + math.cos(angle) * length),
+                             int(centerY + math.sin(angle) * length))
+        return hand
+
+    if isinstance(element, Trace):
+        inner = radius * element.inner
+        span = radius * (element.outer - element.inner)
+
+        def trace(painter: QPainter, values: Values) -> None:
+            history = values.get(element.channel)
+            if not history or len(history) < 2:
+                return
+            painter.setPen(element.pen)
+            step = span / (len(history) - 1)
+            # Une ligne par suite de valeurs connues
+            points = []
+            for index, value in enumerate(history):
+                if value is None:
+                    if len(points) > 1:
+                        painter.drawPolyline(points)
+                    points = []
+                    continue
+                angle = element.angle(value)
+                distance = inner + index * step
+                points.append(QPointF(centerX + math.cos(angle) * distance, centerY + math.sin(angle) * distance))
+            if len(points) > 1:
+                painter.drawPolyline(points)
+        return trace
+
+    if isinstance(element, Rose):
+        return _compileRose(element, theme, centerX, centerY, radius, height)
+
+    raise TypeError("unknown dial element: %r" % (element,))
+
+
+def _compileRose(rose: Rose, theme, centerX: float, centerY: float, radius: float, height: int) -> Step:
+    # La géométrie est construite autour de l'origine et seulement tournée à la peinture ;
+    # les textes sont redessinés droits, à leurs positions tournées
+    blocks = []
+    for element in rose.elements:
+        if isinstance(element, Labels):
+            blocks.append((element, None))
+        elif blocks and blocks[-1][1] is not None:
+            blocks[-1][1].append(_compile(element, theme, 0, 0, radius, height))
+        else:
+            blocks.append((None, [_compile(element, theme, 0, 0, radius, height)]))
+
+    def paintRose(painter: QPainter, values: Values) -> None:
+        degrees = -values.get(rose.channel, 0.0)
+        offset = math.radians(degrees)
+
+        for labels, steps in blocks:
+            if steps is not None:
+                painter.save()
+                painter.translate(centerX, centerY)
+                painter.rotate(degrees)
+                for step in steps:
+                    step(painter, values)
+                painter.restore()
+                continue
+
+            _setFont(painter, labels.pointSize)
+            painter.setPen(labels.pen)
+            delta = radius * labels.dy
+            for text, point in zip(labels.texts, labels.table.points(centerX, centerY, radius * labels.radius,
+                                                                     offset)):
+                labelCache.drawText(painter, int(point.x()) + labels.dx, int(point.y() + delta), text)
+
+    return paintRose
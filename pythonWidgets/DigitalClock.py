@@ -1,80 +1,307 @@
+import math
 import sys
+from collections import OrderedDict
+from typing import Optional
 
-from PySide6.QtCore import QDateTime, QLocale, QTimer
-from PySide6.QtGui import QPaintEvent, QPainter, QColor, QPen, Qt, QFont
+from PySide6.QtCore import QDateTime, QLocale, QRect, QRectF, QPointF
+from PySide6.QtGui import QPainter, Qt, QFont, QShowEvent, QHideEvent, QCloseEvent
+from PySide6.QtGui import QFontMetrics, QPixmap, QRegion
 from PySide6.QtWidgets import QMainWindow, QApplication
 
+from .ClockScheduler import ClockScheduler, SECOND, MINUTE
+from .GaugeWidget import GaugeWidget, paintRatio
+from .PaintStats import PaintStats
+from .Theme import resources
+
+ARC_WIDTH = 25
+
+# Backgrounds shared by every clock of the same size and colors, least recently used dropped first
+BACKGROUND_CACHE_SIZE = 8
+_backgrounds = OrderedDict()
+
+# Fonts are shared too: QFont is implicitly shared, but building one per clock still costs
+TIME_FONT = QFont()
+TIME_FONT.setPixelSize(90)
+TEXT_FONT = QFont()
+TEXT_FONT.setPointSize(20)
+
+
+def _background(width: int, height: int, dpr: float, antialiasing: bool, dark: str, light: str) -> QPixmap:
+    key = (width, height, dpr, antialiasing, dark, light)
+    background = _backgrounds.get(key)
+    if background is not None:
+        _backgrounds.move_to_end(key)
+        return background
+
+    background = QPixmap(int(width * dpr), int(height * dpr))
+    background.setDevicePixelRatio(dpr)
+    background.fill(Qt.transparent)
+
+    painter = QPainter(background)
+    painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+
+    # Drawing the base circle
+    rect = QRect(0, 0, width, height)
+    painter.setPen(resources.color(dark))
+    painter.setBrush(resources.color(dark))
+    painter.drawEllipse(rect.adjusted(20, 20, -20, -20))
+
+    # Draw the arc path
+    painter.setPen(resources.pen(light, ARC_WIDTH))
+    painter.drawEllipse(rect.adjusted(50, 50, -50, -50))
+    painter.end()
+
+    _backgrounds[key] = background
+    while len(_backgrounds) > BACKGROUND_CACHE_SIZE:
+        _backgrounds.popitem(last=False)
+    return background
+
+
+class DigitalClockModel:
+    # Texts shown by a digital clock, independent of any widget; without a __dict__ an instance stays tiny
+    __slots__ = ("__secondsVisible", "__minute", "__day", "__dayText", "__dateText", "__timeText", "__lastSecond")
+
+    def __init__(self, secondsVisible: bool = True):
+        self.__secondsVisible = secondsVisible
+        # Minute and day the formatted strings were built for, last second drawn
+        self.__minute = None
+        self.__day = None
+        self.__dayText = ""
+        self.__dateText = ""
+        self.__timeText = ""
+        self.__lastSecond = None
+
+    def secondsVisible(self) -> bool:
+        return self.__secondsVisible
+
+    def setSecondsVisible(self, value: bool) -> bool:
+        if value == self.__secondsVisible:
+            return False
+        self.__secondsVisible = value
+        return True
+
+    def minute(self) -> Optional[int]:
+        # Minutes since the epoch of the current texts, None before the first paint
+        return self.__minute
+
+    def day(self) -> str:
+        return self.__dayText
+
+    def date(self) -> str:
+        return self.__dateText
+
+    def time(self) -> str:
+        return self.__timeText
+
+    def lastSecond(self) -> Optional[int]:
+        return self.__lastSecond
+
+    def setLastSecond(self, second: int) -> None:
+        self.__lastSecond = second
+
+    def setDateTime(self, datetime: QDateTime) -> bool:
+        # hh:mm changes once a minute, day and date once a day; returns True if the texts changed
+        minute = datetime.toSecsSinceEpoch() // 60
+        if self.__minute == minute:
+            return False
+
+        day = datetime.date().toJulianDay()
+        if self.__day != day:
+            self.__dayText = datetime.toString("dddd")
+            self.__dateText = datetime.toString("dd/MM/yyyy")
+            self.__day = day
+        self.__timeText = datetime.toString("hh:mm")
+        self.__minute = minute
+        return True
+
+
+class DigitalClockWidget(GaugeWidget):
+    # Colors are class attributes: assigning one on an instance overrides it for that clock only
+    dark = "#3B3A44"
+    light = "#4a4953"
+    green = "#75ECB5"
 
-class DigitalClockWidget(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.dark = "#3B3A44"
-        self.light = "#4a4953"
-        self.green = "#75ECB5"
+        self.__model = DigitalClockModel()
+        self.__antialiasing = True
+        self.__paintStats = None
+
+        # Cached background and text positions, laid out for the size in __layoutKey
+        self.__background = None
+        self.__backgroundKey = None
+        self.__layoutKey = None
+        self.__timeRect = QRect()
+        self.__dayRect = QRect()
+        self.__dateRect = QRect()
+
+        self.__timeFont = TIME_FONT
+        self.__textFont = TEXT_FONT
+
+    def antialiasing(self) -> bool:
+        return self.__antialiasing
+
+    def setAntialiasing(self, value: bool) -> None:
+        self.__antialiasing = value
+        self.update()
 
-        self.timer = QTimer()
-        self.timer.setInterval(1000)
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
 
-        self.timer.timeout.connect(self.update)
-        self.timer.start()
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        # Optional paint instrumentation, disabled by default
+        self.__paintStats = stats
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        super().paintEvent(event)
+    def model(self) -> DigitalClockModel:
+        return self.__model
 
+    def secondsVisible(self) -> bool:
+        return self.__model.secondsVisible()
+
+    def setSecondsVisible(self, value: bool) -> None:
+        # Without seconds, one wake-up per minute is enough
+        if not self.__model.setSecondsVisible(value):
+            return
+        if self.isVisible():
+            self.__subscribe()
+        self.update()
+
+    def __subscribe(self) -> None:
+        ClockScheduler.instance().subscribe(self, self.__tick, SECOND if self.__model.secondsVisible() else MINUTE)
+
+    def __tick(self) -> None:
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+
+        # Within a minute only the seconds text and the new arc segment change
+        datetime = QDateTime.currentDateTime()
+        second = datetime.time().second()
+        previous = self.__model.lastSecond()
+        if (not self.__model.secondsVisible() or previous is None or second <= previous
+                or self.__layoutKey is None or self.__model.minute() != datetime.toSecsSinceEpoch() // 60):
+            self.update()
+            return
+
+        region = QRegion(self.__arcRect(previous, second))
+        region += self.__secondRect(previous)
+        region += self.__secondRect(second)
+        self.update(region)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        # The clock is only woken up while it is visible
+        super().showEvent(event)
+        self.__subscribe()
+        self.update()
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        super().hideEvent(event)
+        ClockScheduler.instance().unsubscribe(self)
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        ClockScheduler.instance().unsubscribe(self)
+
+    def invalidateCache(self) -> None:
+        self.__background = None
+        self.__backgroundKey = None
+        self.__layoutKey = None
+        self.update()
+
+    def __updateBackground(self, dpr: float) -> None:
+        key = (self.width(), self.height(), dpr, self.__antialiasing, self.dark, self.light)
+        if self.__backgroundKey == key:
+            return
+
+        self.__background = _background(*key)
+        self.__backgroundKey = key
+
+    def __updateTexts(self, datetime: QDateTime) -> None:
+        # Text positions depend on the texts and on the size
+        if not self.__model.setDateTime(datetime) and self.__layoutKey == self.size():
+            return
+
+        model = self.__model
+        arcRect = self.rect().adjusted(50, 50, -50, -50)
+        self.__timeRect = self.__textRect(arcRect, self.__timeFont, Qt.AlignCenter, model.time())
+        arcRect.moveTop(-80)
+        self.__dayRect = self.__textRect(arcRect, self.__textFont, Qt.AlignCenter | Qt.AlignBottom, model.day())
+        arcRect.moveTop(-20)
+        self.__dateRect = self.__textRect(arcRect, self.__textFont, Qt.AlignCenter | Qt.AlignBottom, model.date())
+
+        self.__layoutKey = self.size()
+
+    def __textRect(self, rect: QRect, font: QFont, flags: int, text: str) -> QRect:
+        return QFontMetrics(font).boundingRect(rect, flags, text).adjusted(-2, -2, 2, 2)
+
+    def __secondRect(self, second: int) -> QRect:
+        arcRect = self.rect().adjusted(50, 50, -50, -50)
+        arcRect.moveTop(-120)
+        return self.__textRect(arcRect, self.__textFont, Qt.AlignCenter | Qt.AlignTop, "%02d" % second)
+
+    def __arcRect(self, start: int, end: int) -> QRect:
+        # Bounding box of the arc between two seconds, including the pen width and round caps.
+        # Quarter points crossed by the arc are its extremes: after skipped ticks it can pass one
+        arcRect = QRectF(self.rect().adjusted(50, 50, -50, -50))
+        center = arcRect.center()
+        xs = []
+        ys = []
+        for second in (start, end, *(quarter for quarter in (15, 30, 45) if start < quarter < end)):
+            angle = math.radians(90 + self.secondToAngle(second))
+            xs.append(center.x() + arcRect.width() / 2 * math.cos(angle))
+            ys.append(center.y() - arcRect.height() / 2 * math.sin(angle))
+
+        margin = ARC_WIDTH / 2 + 2
+        return QRectF(QPointF(min(xs), min(ys)), QPointF(max(xs), max(ys))).adjusted(
+            -margin, -margin, margin, margin).toAlignedRect()
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
         datetime = QDateTime().currentDateTime()
+        second = datetime.time().second()
 
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        # The ratio of the paint target, which render() may point at a HiDPI image
+        self.__updateBackground(paintRatio(painter))
+        self.__updateTexts(datetime)
 
-        # Drawing the base circle
-        baseRect = self.rect().adjusted(20, 20, -20, -20)
-        painter.setPen(QColor(self.dark))
-        painter.setBrush(QColor(self.dark))
-        painter.drawEllipse(baseRect)
+        painter.setRenderHint(QPainter.Antialiasing, self.__antialiasing)
+
+        # Base circle and arc path come from the cache
+        painter.drawPixmap(0, 0, self.__background)
 
-        # Draw the arc path
-        pen = QPen(QColor(self.light))
-        pen.setWidth(25)
-        painter.setPen(pen)
         arcRect = self.rect().adjusted(50, 50, -50, -50)
-        painter.drawEllipse(arcRect)
 
         # Draw active arc
-        pen.setColor(QColor(self.green))
-        pen.setCapStyle(Qt.RoundCap)
-        startAngle = 90
-        spanAngle = self.secondToAngle(datetime.time().second())
-        painter.setPen(pen)
-        painter.drawArc(arcRect, startAngle * 16, spanAngle * 16)
-
-        # Instantiate date
-        time = datetime.toString("hh:mm")
-        day = datetime.toString("dddd")
-        date = datetime.toString("dd/MM/yyyy")
-        second = datetime.toString("ss")
+        if self.__model.secondsVisible():
+            startAngle = 90
+            spanAngle = self.secondToAngle(second)
+            painter.setPen(resources.pen(self.green, ARC_WIDTH, Qt.RoundCap))
+            painter.drawArc(arcRect, startAngle * 16, spanAngle * 16)
 
+        # Only the texts touched by the repainted area are drawn again
+        dirty = region
         painter.setPen(Qt.white)
-        font = QFont()
 
         # Draw hour
-        font.setPixelSize(90)
-        painter.setFont(font)
-        painter.drawText(arcRect, Qt.AlignCenter, time)
+        if dirty.intersects(self.__timeRect):
+            painter.setFont(self.__timeFont)
+            painter.drawText(arcRect, Qt.AlignCenter, self.__model.time())
 
         # Draw day
-        font.setPointSize(20)
-        painter.setFont(font)
-        arcRect.moveTop(-80)
-        painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignBottom, day)
+        painter.setFont(self.__textFont)
+        if dirty.intersects(self.__dayRect):
+            arcRect.moveTop(-80)
+            painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignBottom, self.__model.day())
 
         # Draw date
-        arcRect.moveTop(-20)
-        painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignBottom, date)
+        if dirty.intersects(self.__dateRect):
+            arcRect.moveTop(-20)
+            painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignBottom, self.__model.date())
 
         # Draw second
-        painter.setPen(QPen(self.green))
-        arcRect.moveTop(-120)
-        painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignTop, second)
+        if self.__model.secondsVisible():
+            painter.setPen(resources.pen(self.green))
+            arcRect.moveTop(-120)
+            painter.drawText(arcRect, Qt.AlignCenter | Qt.AlignTop, "%02d" % second)
+
+        self.__model.setLastSecond(second)
 
     def secondToAngle(self, second):
         return -second * 360 / 60
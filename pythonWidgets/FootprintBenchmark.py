@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+DEFAULT_COUNT = 1000
+DEFAULT_RUNS = 3
+DEFAULT_SIZE = 200
+
+WIDGETS = ["SpeedWidget", "ClockWidget", "CompassWidget", "DigitalClockWidget"]
+
+# Exécuté dans un interpréteur neuf par type de widget : la mémoire mesurée n'est due qu'aux instances créées
+PROBE = r"""
+import gc, json, os, resource, sys, time
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+def rss():
+    # Mémoire résidente courante ; à défaut de /proc, le pic depuis le démarrage
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+import pythonWidgets
+cls = getattr(pythonWidgets, sys.argv[1])
+count, size, paint = int(sys.argv[2]), int(sys.argv[3]), sys.argv[4] == "1"
+app = QApplication([])
+image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+
+# Une première instance peinte puis détruite : modules, polices et caches partagés ne comptent pas
+first = cls()
+first.resize(size, size)
+first.render(image)
+first.deleteLater()
+app.processEvents()
+gc.collect()
+
+before = rss()
+start = time.perf_counter()
+widgets = [cls() for _ in range(count)]
+constructed = time.perf_counter()
+for widget in widgets:
+    widget.resize(size, size)
+app.processEvents()
+afterConstruct = rss()
+
+result = {"constructMs": (constructed - start) * 1000, "constructedBytes": afterConstruct - before}
+if paint:
+    start = time.perf_counter()
+    for widget in widgets:
+        widget.render(image)
+    result["paintMs"] = (time.perf_counter() - start) * 1000
+    app.processEvents()
+    result["paintedBytes"] = rss() - before
+
+json.dump(result, sys.stdout)
+"""
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"mean": statistics.fmean(samples), "min": min(samples), "max": max(samples)}
+
+
+def measure(name: str, count: int, runs: int, size: int, paint: bool) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+
+    probes = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE, name, str(count), str(size), "1" if paint else "0"],
+                                cwd=root, env=env, check=True, capture_output=True, text=True).stdout
+        probes.append(json.loads(output))
+
+    # Ramené à 1000 instances, en Mo pour la mémoire
+    scale = 1000 / count
+    result = {
+        "widget": name,
+        "count": count,
+        "runs": runs,
+        "constructMsPer1000": summarize([probe["constructMs"] * scale for probe in probes]),
+        "rssMbPer1000": summarize([probe["constructedBytes"] * scale / 2 ** 20 for probe in probes]),
+    }
+    if paint:
+        result["paintMsPer1000"] = summarize([probe["paintMs"] * scale for probe in probes])
+        result["paintedRssMbPer1000"] = summarize([probe["paintedBytes"] * scale / 2 ** 20 for probe in probes])
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Construction time and resident memory per 1000 widget instances")
+    parser.add_argument("--widgets", nargs="+", choices=WIDGETS, default=WIDGETS)
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="instances created per run")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--paint", action="store_true",
+                        help="also paint every instance once, to count per-instance caches")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = [measure(name, args.count, args.runs, args.size, args.paint) for name in args.widgets]
+    report = {"python": sys.version.split()[0], "size": args.size, "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
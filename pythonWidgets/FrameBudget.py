@@ -0,0 +1,73 @@
+from typing import Optional
+
+# Poids de la dernière peinture dans la moyenne glissante
+SMOOTHING = 0.3
+
+# Peintures consécutives au-dessus du budget avant de dégrader d'un niveau,
+# et sous RESTORE_RATIO fois le budget avant de rétablir le niveau précédent
+DEGRADE_FRAMES = 3
+RESTORE_FRAMES = 30
+RESTORE_RATIO = 0.5
+
+
+class FrameBudget:
+    # Abaisse le niveau de détail quand la peinture dépasse durablement son budget, le rétablit quand la charge baisse.
+    # L'écart entre les deux seuils évite d'osciller d'un niveau à l'autre.
+
+    def __init__(self, budgetMs: float, maxLevel: int = 2):
+        self.setBudget(budgetMs)
+        self.__maxLevel = maxLevel
+        self.__level = 0
+        self.__reset()
+
+    def budget(self) -> float:
+        return self.__budget
+
+    def setBudget(self, budgetMs: float) -> None:
+        if budgetMs <= 0:
+            raise ValueError("budget must be positive")
+        self.__budget = budgetMs
+
+    def level(self) -> int:
+        # 0 : pleine qualité ; chaque niveau en plus retire du détail
+        return self.__level
+
+    def average(self) -> Optional[float]:
+        return self.__average
+
+    def record(self, durationMs: float, maxLevel: Optional[int] = None) -> bool:
+        # Renvoie True si le niveau a changé ; `maxLevel` borne la dégradation pour cette peinture
+        ceiling = self.__maxLevel if maxLevel is None else min(maxLevel, self.__maxLevel)
+        if self.__average is None:
+            self.__average = durationMs
+        else:
+            self.__average += (durationMs - self.__average) * SMOOTHING
+
+        if self.__average > self.__budget:
+            self.__over += 1
+            self.__under = 0
+        elif self.__average < self.__budget * RESTORE_RATIO:
+            self.__under += 1
+            self.__over = 0
+        else:
+            self.__over = self.__under = 0
+
+        if self.__over >= DEGRADE_FRAMES and self.__level < ceiling:
+            self.__level += 1
+        elif self.__under >= RESTORE_FRAMES and self.__level > 0:
+            self.__level -= 1
+        else:
+            return False
+
+        # Les durées mesurées à l'ancien niveau ne disent rien du nouveau
+        self.__reset()
+        return True
+
+    def reset(self) -> None:
+        self.__level = 0
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.__average = None
+        self.__over = 0
+        self.__under = 0
@@ -0,0 +1,37 @@
+import time
+
+from PySide6.QtCore import QEvent, QObject, Qt
+from PySide6.QtGui import QPainter, QRegion
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+
+
+class GLSurface(QOpenGLWidget):
+    # Recouvre son widget hôte et rejoue sa peinture dans un framebuffer OpenGL
+
+    def __init__(self, host: "GaugeWidget"):
+        super().__init__(host)
+        self.__host = host
+
+        # Toute la surface est repeinte à chaque image : Qt n'a rien à dessiner dessous
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setGeometry(host.rect())
+        host.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self.__host and event.type() == QEvent.Resize:
+            self.setGeometry(self.__host.rect())
+        return False
+
+    def paintGL(self) -> None:
+        stats = self.__host.paintStats()
+        start = time.perf_counter_ns()
+
+        # Le framebuffer n'hérite pas du fond du parent, on le remplit comme le ferait Qt en raster
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.__host.palette().window())
+        self.__host.paintFrame(painter, QRegion(self.rect()))
+        painter.end()
+
+        if stats is not None:
+            stats.recordPaint(start, time.perf_counter_ns())
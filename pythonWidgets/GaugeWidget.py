@@ -0,0 +1,159 @@
+import math
+import time
+from enum import Enum
+from typing import Optional
+
+from PySide6.QtGui import QGuiApplication, QOpenGLContext, QPaintEvent, QPainter, QRegion
+from PySide6.QtWidgets import QWidget
+
+from .DialSpec import Detail
+from .FrameBudget import FrameBudget
+from .PaintStats import instrumentPaint
+
+
+class RenderBackend(Enum):
+    # QPainter raster dans le backing store du widget
+    Raster = 0
+    # QPainter sur un framebuffer OpenGL, les dégradés et l'antialiasing sont faits par le GPU
+    OpenGL = 1
+
+
+_openGLAvailable = None
+
+
+def openGLAvailable() -> bool:
+    # Un contexte de test est créé une seule fois ; faux sans GPU ni Mesa, ou avec la plateforme offscreen
+    global _openGLAvailable
+    if _openGLAvailable is None:
+        _openGLAvailable = False
+        if QGuiApplication.instance() is not None:
+            context = QOpenGLContext()
+            _openGLAvailable = context.create() and context.isValid()
+        if _openGLAvailable:
+            # QtOpenGLWidgets, chargé seulement ici, est absent de certaines distributions de Qt
+            try:
+                from . import GLSurface
+            except ImportError:
+                _openGLAvailable = False
+    return _openGLAvailable
+
+
+def paintRatio(painter: QPainter) -> float:
+    # Pixels de la cible par pixel logique, à passer aux calques mis en cache.
+    # Ni le widget ni painter.device() ne le donnent quand render() redirige la peinture vers une image HiDPI :
+    # painter.device() reste alors le widget, de ratio 1 hors écran. L'échelle de la transformation vers
+    # la cible est juste dans tous les cas
+    transform = painter.deviceTransform()
+    return round(math.hypot(transform.m11(), transform.m12()), 4)
+
+
+class GaugeWidget(QWidget):
+    # Widget peint par paintGauge(), soit directement en raster, soit à travers une surface OpenGL enfant
+
+    def __init__(self):
+        super().__init__()
+        self.__surface = None
+
+        # Niveau de détail choisi selon le rayon affiché, et dégradé en plus si la peinture dépasse son budget
+        self.__levelOfDetail = False
+        self.__budget = None
+
+    def backend(self) -> RenderBackend:
+        return RenderBackend.Raster if self.__surface is None else RenderBackend.OpenGL
+
+    def setBackend(self, backend: RenderBackend) -> RenderBackend:
+        # Renvoie le backend réellement utilisé : on reste en raster quand OpenGL n'est pas disponible
+        if backend is RenderBackend.OpenGL and not openGLAvailable():
+            backend = RenderBackend.Raster
+
+        if backend is self.backend():
+            return backend
+
+        if backend is RenderBackend.OpenGL:
+            from .GLSurface import GLSurface
+            self.__surface = GLSurface(self)
+            self.__surface.show()
+        else:
+            self.removeEventFilter(self.__surface)
+            self.__surface.hide()
+            self.__surface.deleteLater()
+            self.__surface = None
+
+        super().update()
+        return backend
+
+    def levelOfDetail(self) -> bool:
+        return self.__levelOfDetail
+
+    def setLevelOfDetail(self, enabled: bool) -> None:
+        # Omet les graduations et textes trop serrés pour la taille affichée
+        if enabled == self.__levelOfDetail:
+            return
+        self.__levelOfDetail = enabled
+        self.update()
+
+    def frameBudget(self) -> Optional[float]:
+        return self.__budget.budget() if self.__budget is not None else None
+
+    def setFrameBudget(self, budgetMs: Optional[float]) -> None:
+        # Durée de peinture visée en ms ; None désactive la dégradation automatique
+        if budgetMs is None:
+            self.__budget = None
+        elif self.__budget is None:
+            self.__budget = FrameBudget(budgetMs)
+        else:
+            self.__budget.setBudget(budgetMs)
+        self.update()
+
+    def detail(self) -> Detail:
+        # Niveau de détail de la prochaine peinture
+        level = Detail.Reduced.value if self.__levelOfDetail else Detail.Full.value
+        if self.__budget is not None:
+            level += self.__budget.level()
+        return Detail(min(level, Detail.Minimal.value))
+
+    def paintStats(self):
+        # Redéfini par les widgets qui acceptent un PaintStats
+        return None
+
+    def update(self, *args) -> None:
+        # Avec OpenGL, c'est la surface qui recouvre le widget qu'il faut repeindre
+        if self.__surface is None:
+            super().update(*args)
+        else:
+            self.__surface.update(*args)
+
+    def repaint(self, *args) -> None:
+        if self.__surface is None:
+            super().repaint(*args)
+        else:
+            self.__surface.repaint(*args)
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        # Dessine le widget avec `painter`, sur lui-même ou sur sa surface OpenGL ; `region` est la zone à repeindre
+        raise NotImplementedError
+
+    def paintFrame(self, painter: QPainter, region: QRegion) -> None:
+        # paintGauge, chronométré quand un budget est fixé
+        if self.__budget is None:
+            self.paintGauge(painter, region)
+            return
+
+        start = time.perf_counter_ns()
+        self.paintGauge(painter, region)
+        base = Detail.Reduced.value if self.__levelOfDetail else Detail.Full.value
+        if self.__budget.record((time.perf_counter_ns() - start) / 1e6, Detail.Minimal.value - base):
+            # Un niveau rétabli doit être affiché même si aucune valeur ne change
+            self.update()
+
+    @instrumentPaint
+    def paintEvent(self, event: QPaintEvent) -> None:
+        super().paintEvent(event)
+
+        # La surface OpenGL se peint elle-même
+        if self.__surface is not None:
+            return
+
+        painter = QPainter(self)
+        self.paintFrame(painter, event.region())
+        painter.end()
@@ -0,0 +1,184 @@
+import math
+from array import array
+from collections import deque
+from typing import List, Optional
+
+from .Telemetry import TelemetryWindow
+
+# Échantillons conservés par défaut : une minute à 1 kHz, 1 Mo pour les deux tableaux
+DEFAULT_CAPACITY = 60000
+
+# Fenêtre glissante du maximum, du minimum et de la moyenne récents, en secondes
+DEFAULT_WINDOW = 3.0
+
+
+class SampleHistory:
+    # Anneau de capacité fixe d'échantillons (temps, valeur) : mémoire bornée, coût constant par échantillon.
+    # Les horodatages doivent être croissants. Les statistiques du trajet portent sur tous les échantillons reçus
+    # depuis reset(), celles de la fenêtre sur ceux des `window` dernières secondes.
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, window: float = DEFAULT_WINDOW):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.__capacity = capacity
+        self.__times = array("d", bytes(8 * capacity))
+        self.__values = array("d", bytes(8 * capacity))
+        self.reset()
+        self.setWindow(window)
+
+    def __len__(self) -> int:
+        return min(self.__next, self.__capacity)
+
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def window(self) -> float:
+        return self.__window
+
+    def setWindow(self, window: float) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.__window = window
+        self.__rebuildWindow()
+
+    def reset(self) -> None:
+        # Numéro du prochain échantillon ; l'échantillon n est rangé à l'indice n % capacité
+        self.__next = 0
+
+        # Trajet
+        self.__minimum = math.inf
+        self.__maximum = -math.inf
+        self.__sum = 0.0
+        self.__integral = 0.0
+
+        # Fenêtre : premier échantillon retenu, somme, et files monotones de numéros d'échantillons
+        # dont les valeurs décroissent (maximum en tête) ou croissent (minimum en tête)
+        self.__first = 0
+        self.__windowSum = 0.0
+        self.__maxima = deque()
+        self.__minima = deque()
+
+    def append(self, time: float, value: float) -> None:
+        # O(1) amorti : chaque échantillon entre et sort au plus une fois des files monotones
+        if self.__next >= self.__capacity:
+            # L'échantillon écrasé quitte la fenêtre avant d'être remplacé
+            self.__drop(self.__next - self.__capacity + 1)
+
+        index = self.__next % self.__capacity
+        if self.__next:
+            previous = (self.__next - 1) % self.__capacity
+            # Aire sous la courbe par trapèzes, en valeur x secondes
+            self.__integral += (self.__values[previous] + value) * (time - self.__times[previous]) / 2
+        self.__times[index] = time
+        self.__values[index] = value
+        self.__next += 1
+
+        if value < self.__minimum:
+            self.__minimum = value
+        if value > self.__maximum:
+            self.__maximum = value
+        self.__sum += value
+
+        self.__enter(self.__next - 1, value)
+        self.expire(time)
+
+    def expire(self, now: float) -> None:
+        # Retire de la fenêtre les échantillons plus vieux que `window` secondes.
+        # Le dernier échantillon reste : c'est la valeur courante, tenue jusqu'au suivant
+        oldest = self.__first
+        while oldest < self.__next - 1 and self.__times[oldest % self.__capacity] < now - self.__window:
+            oldest += 1
+        self.__drop(oldest)
+
+    def __enter(self, number: int, value: float) -> None:
+        # L'échantillon `number` entre dans la fenêtre ; ceux qu'il domine ne seront plus jamais en tête
+        self.__windowSum += value
+        maxima = self.__maxima
+        while maxima and self.__values[maxima[-1] % self.__capacity] <= value:
+            maxima.pop()
+        maxima.append(number)
+        minima = self.__minima
+        while minima and self.__values[minima[-1] % self.__capacity] >= value:
+            minima.pop()
+        minima.append(number)
+
+    def __drop(self, first: int) -> None:
+        # Les échantillons de numéro < `first` quittent la fenêtre
+        for number in range(self.__first, first):
+            self.__windowSum -= self.__values[number % self.__capacity]
+        if first > self.__first:
+            self.__first = first
+        while self.__maxima and self.__maxima[0] < first:
+            self.__maxima.popleft()
+        while self.__minima and self.__minima[0] < first:
+            self.__minima.popleft()
+
+    def last(self) -> Optional[float]:
+        return self.__values[(self.__next - 1) % self.__capacity] if self.__next else None
+
+    def lastTime(self) -> Optional[float]:
+        return self.__times[(self.__next - 1) % self.__capacity] if self.__next else None
+
+    def peak(self) -> Optional[float]:
+        # Maximum de la fenêtre, en O(1)
+        return self.__values[self.__maxima[0] % self.__capacity] if self.__next else None
+
+    def peakTime(self) -> Optional[float]:
+        # Instant du maximum de la fenêtre : il en sortira `window` secondes plus tard, sauf s'il est dépassé
+        return self.__times[self.__maxima[0] % self.__capacity] if self.__next else None
+
+    def recent(self) -> Optional[TelemetryWindow]:
+        # Échantillons de la fenêtre
+        if not self.__next:
+            return None
+        count = self.__next - self.__first
+        return TelemetryWindow(self.last(), self.__values[self.__minima[0] % self.__capacity], self.peak(),
+                               self.__windowSum / count, count)
+
+    def trip(self) -> Optional[TelemetryWindow]:
+        # Tous les échantillons reçus depuis reset(), y compris ceux sortis de l'anneau
+        if not self.__next:
+            return None
+        return TelemetryWindow(self.last(), self.__minimum, self.__maximum, self.__sum / self.__next, self.__next)
+
+    def integral(self) -> float:
+        # Aire sous la courbe depuis reset() : une distance en km pour des vitesses en km/h, divisée par 3600
+        return self.__integral
+
+    def trace(self, now: float, points: int) -> List[Optional[float]]:
+        # Valeur tenue à `points` instants régulièrement répartis sur la fenêtre finissant à `now`, du plus ancien
+        # au plus récent ; None avant le plus vieil échantillon conservé. O(points x log(capacité))
+        if points < 2:
+            raise ValueError("at least two points are needed")
+
+        oldest = max(0, self.__next - self.__capacity)
+        step = self.__window / (points - 1)
+        values = []
+        for point in range(points):
+            number = self.__indexAt(now - self.__window + point * step, oldest)
+            values.append(self.__values[number % self.__capacity] if number >= oldest else None)
+        return values
+
+    def __indexAt(self, time: float, oldest: int) -> int:
+        # Numéro du dernier échantillon d'horodatage <= `time`, oldest - 1 s'il n'y en a pas
+        low, high = oldest, self.__next
+        while low < high:
+            middle = (low + high) // 2
+            if self.__times[middle % self.__capacity] <= time:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def __rebuildWindow(self) -> None:
+        # Après un changement de fenêtre, les files sont reconstruites depuis le début de l'anneau
+        if not self.__next:
+            return
+        now = self.lastTime()
+        self.__first = max(0, self.__next - self.__capacity)
+        self.__windowSum = 0.0
+        self.__maxima.clear()
+        self.__minima.clear()
+        for number in range(self.__first, self.__next):
+            self.__enter(number, self.__values[number % self.__capacity])
+        self.expire(now)
@@ -0,0 +1,77 @@
+import math
+from collections import OrderedDict
+
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QFont, QFontMetricsF, QPainter, QStaticText, QTransform
+
+DEFAULT_CAPACITY = 512
+
+
+class LabelCache:
+    # Textes mis en forme une seule fois (QStaticText), partagés par tous les widgets
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.__capacity = capacity
+        self.__labels = OrderedDict()
+        self.__ascents = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__labels)
+
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def setCapacity(self, capacity: int) -> None:
+        self.__capacity = capacity
+        self.__evict()
+
+    def clear(self) -> None:
+        self.__labels.clear()
+        self.__ascents.clear()
+
+    def label(self, text: str, font: QFont, ratio: float = 1.0) -> QStaticText:
+        # Le ratio fait partie de la clé : la mise en page préparée dépend de la résolution de la cible,
+        # un même libellé n'est donc pas partagé entre écrans de ratios différents
+        key = (text, font.key(), ratio)
+        label = self.__labels.get(key)
+        if label is not None:
+            self.hits += 1
+            self.__labels.move_to_end(key)
+            return label
+
+        self.misses += 1
+        label = QStaticText(text)
+        label.setTextFormat(Qt.PlainText)
+        label.setPerformanceHint(QStaticText.AggressiveCaching)
+        label.prepare(QTransform.fromScale(ratio, ratio), font)
+
+        self.__labels[key] = label
+        self.__evict()
+        return label
+
+    def ascent(self, font: QFont) -> float:
+        key = font.key()
+        ascent = self.__ascents.get(key)
+        if ascent is None:
+            ascent = self.__ascents[key] = QFontMetricsF(font).ascent()
+        return ascent
+
+    def drawText(self, painter: QPainter, x: float, y: float, text: str) -> None:
+        # Même convention que QPainter.drawText(x, y, text) : y est la ligne de base
+        # Ratio lu sur la transformation, comme paintRatio() : painter.device() reste le widget sous render()
+        font = painter.font()
+        transform = painter.deviceTransform()
+        ratio = round(math.hypot(transform.m11(), transform.m12()), 4)
+        painter.drawStaticText(QPointF(x, y - self.ascent(font)), self.label(text, font, ratio))
+
+    def __evict(self) -> None:
+        # On retire les libellés les moins récemment utilisés
+        while len(self.__labels) > self.__capacity:
+            self.__labels.popitem(last=False)
+
+
+# Cache commun à tous les widgets
+labelCache = LabelCache()
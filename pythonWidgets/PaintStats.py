@@ -0,0 +1,133 @@
+import functools
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QPaintEvent
+from PySide6.QtWidgets import QWidget
+
+DEFAULT_CAPACITY = 600
+
+# Bornes supérieures (ms) des classes de l'histogramme, la dernière classe reçoit le reste
+DEFAULT_BOUNDS = (1, 2, 4, 8, 16, 33, 66)
+
+
+class PaintStats(QObject):
+    # Durée de la peinture et latence depuis la première demande non servie, en millisecondes
+    painted = Signal(float, float)
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.__durations = deque(maxlen=capacity)
+        self.__intervals = deque(maxlen=capacity)
+        self.__latencies = deque(maxlen=capacity)
+
+        self.__lastStart = None
+        self.__pendingSince = None
+
+        self.requested = 0
+        self.dropped = 0
+        self.paints = 0
+        self.servedPaints = 0
+
+    def markRequested(self) -> None:
+        # Une nouvelle valeur attend d'être affichée
+        self.requested += 1
+        if self.__pendingSince is None:
+            self.__pendingSince = time.perf_counter_ns()
+
+    def markDropped(self) -> None:
+        # Mise à jour ignorée car la valeur affichée ne change pas
+        self.dropped += 1
+
+    def recordPaint(self, start: int, end: int) -> None:
+        duration = (end - start) / 1e6
+        self.__durations.append(duration)
+
+        if self.__lastStart is not None:
+            self.__intervals.append((start - self.__lastStart) / 1e6)
+        self.__lastStart = start
+
+        latency = 0.0
+        if self.__pendingSince is not None:
+            latency = (end - self.__pendingSince) / 1e6
+            self.__latencies.append(latency)
+            self.__pendingSince = None
+            self.servedPaints += 1
+
+        self.paints += 1
+        self.painted.emit(duration, latency)
+
+    def coalesced(self) -> int:
+        # Demandes prises en compte par une peinture déjà servie pour une autre demande
+        return max(0, self.requested - self.servedPaints)
+
+    def frequency(self) -> float:
+        if not self.__intervals:
+            return 0.0
+        # statistics n'est pas importé pour cette seule moyenne : il coûte plusieurs ms au démarrage
+        return 1000 * len(self.__intervals) / sum(self.__intervals)
+
+    def histogram(self, bounds: Sequence[float] = DEFAULT_BOUNDS) -> List[Tuple[float, int]]:
+        counts = [0] * (len(bounds) + 1)
+        for duration in self.__durations:
+            for index, bound in enumerate(bounds):
+                if duration <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return list(zip(list(bounds) + [float("inf")], counts))
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "paints": self.paints,
+            "requested": self.requested,
+            "coalesced": self.coalesced(),
+            "dropped": self.dropped,
+            "frequency": self.frequency(),
+            "durationMs": _percentiles(self.__durations),
+            "latencyMs": _percentiles(self.__latencies),
+        }
+
+    def reset(self) -> None:
+        self.__durations.clear()
+        self.__intervals.clear()
+        self.__latencies.clear()
+        self.__lastStart = None
+        self.__pendingSince = None
+        self.requested = 0
+        self.dropped = 0
+        self.paints = 0
+        self.servedPaints = 0
+
+
+def _percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "p50": ordered[round(last * 0.5)],
+        "p90": ordered[round(last * 0.9)],
+        "p99": ordered[round(last * 0.99)],
+        "max": ordered[-1],
+    }
+
+
+def instrumentPaint(paintEvent: Callable[[QWidget, QPaintEvent], None]) -> Callable[[QWidget, QPaintEvent], None]:
+    # Décore un paintEvent : sans PaintStats attaché, le coût se limite à un appel de méthode
+    @functools.wraps(paintEvent)
+    def wrapper(self: QWidget, event: QPaintEvent) -> None:
+        stats = self.paintStats()
+        if stats is None:
+            paintEvent(self, event)
+            return
+
+        start = time.perf_counter_ns()
+        paintEvent(self, event)
+        stats.recordPaint(start, time.perf_counter_ns())
+
+    return wrapper
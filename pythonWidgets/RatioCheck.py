@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Le contrôle tourne sans affichage, comme le rendu par lots
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from .BatchRender import WIDGETS, FrameRenderer
+
+DEFAULT_SIZE = 200
+DEFAULT_DPR = 2.0
+
+# Une valeur par cadran, lue comme dans un fichier de BatchRender
+VALUES = {"SpeedWidget": "120", "ClockWidget": "2020-01-01T10:10:30", "CompassWidget": "30"}
+
+# Écart toléré, en pour cent des pixels : Pixmap doit reproduire le rendu natif, les listes d'affichage
+# Picture rejouées à l'échelle rastérisent les glyphes un peu différemment
+TOLERANCE = {"Pixmap": 0.1, "Picture": 1.0}
+
+# Différence par canal au-delà de laquelle un pixel compte comme différent
+CHANNEL_THRESHOLD = 32
+
+FRAME_FORMAT = QImage.Format_RGBA8888_Premultiplied
+
+# Référence : le widget lui-même sur un écran au ratio demandé (QT_SCALE_FACTOR), dans un interpréteur neuf
+NATIVE = r"""
+import sys
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from pythonWidgets.BatchRender import WIDGETS
+from pythonWidgets.DialSpec import RenderStrategy
+name, size, strategy, value = sys.argv[1], int(sys.argv[2]), sys.argv[3], sys.argv[4]
+antialiasing, levelOfDetail = sys.argv[5] == "1", sys.argv[6] == "1"
+factory, apply, parse = WIDGETS[name]
+widget = factory()
+widget.resize(size, size)
+widget.setRenderStrategy(RenderStrategy[strategy])
+widget.setAntialiasing(antialiasing)
+widget.setLevelOfDetail(levelOfDetail)
+apply(widget, parse(value))
+image = widget.grab().toImage().convertToFormat(QImage.Format_RGBA8888_Premultiplied)
+sys.stdout.buffer.write(bytes(image.constBits()))
+"""
+
+
+def nativeFrame(name: str, size: int, dpr: float, strategy: str, antialiasing: bool = True,
+                levelOfDetail: bool = False) -> bytes:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", QT_SCALE_FACTOR=str(dpr))
+    command = [sys.executable, "-c", NATIVE, name, str(size), strategy, VALUES[name],
+               "1" if antialiasing else "0", "1" if levelOfDetail else "0"]
+    return subprocess.run(command, cwd=root, env=env, check=True, capture_output=True).stdout
+
+
+def mismatch(expected: bytes, actual: bytes) -> float:
+    # Pour cent des pixels dont un canal s'écarte de plus de CHANNEL_THRESHOLD ; 100 si les tailles diffèrent
+    if len(expected) != len(actual):
+        return 100.0
+    if expected == actual:
+        return 0.0
+    different = 0
+    for offset in range(0, len(expected), 4):
+        for channel in range(4):
+            if abs(expected[offset + channel] - actual[offset + channel]) > CHANNEL_THRESHOLD:
+                different += 1
+                break
+    return 100 * different / max(1, len(expected) // 4)
+
+
+def frameBytes(image: QImage) -> bytes:
+    # La conversion doit vivre le temps de la copie de ses octets
+    converted = image.convertToFormat(FRAME_FORMAT)
+    return bytes(converted.constBits())
+
+
+def check(name: str, size: int, dpr: float, strategy: str) -> dict:
+    # Image de FrameRenderer, dessinée par un widget de ratio 1 dans une QImage au ratio demandé
+    renderer = FrameRenderer(name, size, dpr, strategy=strategy)
+    actual = frameBytes(renderer.render(WIDGETS[name][2](VALUES[name])))
+    renderer.close()
+
+    return result(name, strategy, "FrameRenderer", mismatch(nativeFrame(name, size, dpr, strategy), actual))
+
+
+def checkShared(name: str, size: int, dpr: float, strategy: str) -> dict:
+    # Image d'un processus de rendu, écrite dans la mémoire partagée puis lue telle quelle par l'interface
+    from .SharedRender import SharedRenderPool
+
+    app = QApplication.instance()
+    pool = SharedRenderPool(size, 1, 1, dpr, strategy=strategy)
+    try:
+        index = pool.addGauge(name, WIDGETS[name][2](VALUES[name]))
+        while not pool.isIdle():
+            app.processEvents(QEventLoop.WaitForMoreEvents)
+        actual = frameBytes(pool.image(index))
+    finally:
+        pool.close()
+
+    return result(name, strategy, "SharedRenderPool", mismatch(nativeFrame(name, size, dpr, strategy), actual))
+
+
+def result(name: str, strategy: str, path: str, difference: float) -> dict:
+    return {"widget": name, "strategy": strategy, "path": path, "mismatchPercent": difference,
+            "ok": difference <= TOLERANCE[strategy]}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare frames rendered into HiDPI images with a native HiDPI render")
+    parser.add_argument("--widgets", nargs="+", choices=sorted(VALUES), default=sorted(VALUES))
+    parser.add_argument("--strategies", nargs="+", choices=sorted(TOLERANCE), default=sorted(TOLERANCE))
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--dpr", type=float, default=DEFAULT_DPR)
+    parser.add_argument("--shared", action="store_true",
+                        help="also check frames rendered by a SharedRenderPool worker process")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication([])
+    checks = [check, checkShared] if args.shared else [check]
+    results: List[Dict] = [run(name, args.size, args.dpr, strategy)
+                           for run in checks for name in args.widgets for strategy in args.strategies]
+    report = {"size": args.size, "dpr": args.dpr, "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    # Code de sortie non nul au moindre écart hors tolérance
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
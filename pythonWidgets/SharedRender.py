@@ -0,0 +1,382 @@
+import math
+import multiprocessing
+import os
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRect, QSize, QSocketNotifier, QTimer, Signal
+from PySide6.QtGui import QImage, QPainter, QRegion
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+from .GaugeWidget import GaugeWidget
+from .PaintStats import PaintStats
+from .UpdateScheduler import UpdateScheduler
+
+DEFAULT_SIZE = 100
+DEFAULT_CAPACITY = 256
+
+# Attente maximale d'un processus de rendu à la fermeture, en secondes, avant de l'arrêter de force
+CLOSE_TIMEOUT = 2.0
+
+# Format des images partagées, écrites par les processus de rendu et dessinées telles quelles par l'interface
+FRAME_FORMAT = QImage.Format_RGBA8888_Premultiplied
+
+
+def _frameImage(buffer: memoryview, slot: int, frameBytes: int, width: int, dpr: float) -> Tuple[QImage, memoryview]:
+    # QImage posée sur la mémoire partagée, sans copie ; la vue doit vivre aussi longtemps que l'image
+    view = buffer[slot * frameBytes:(slot + 1) * frameBytes]
+    image = QImage(view, width, width, width * 4, FRAME_FORMAT)
+    image.setDevicePixelRatio(dpr)
+    return image, view
+
+
+def _serve(connection, memoryName: str, frameBytes: int, size: int, dpr: float, antialiasing: bool,
+           strategy: str) -> None:
+    # Boucle d'un processus de rendu : reçoit des lots (case, widget, valeur), dessine chaque image directement
+    # dans sa case de la mémoire partagée, puis renvoie les cases terminées
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from .BatchRender import FrameRenderer
+
+    app = QApplication.instance() or QApplication([])
+    memory = shared_memory.SharedMemory(memoryName)
+    width = int(size * dpr)
+    renderers: Dict[str, FrameRenderer] = {}
+    images: Dict[int, Tuple[QImage, memoryview]] = {}
+
+    try:
+        while True:
+            batch = connection.recv()
+            if batch is None:
+                break
+            for slot, name, value in batch:
+                if slot not in images:
+                    images[slot] = _frameImage(memory.buf, slot, frameBytes, width, dpr)
+                renderer = renderers.get(name)
+                if renderer is None:
+                    renderer = renderers[name] = FrameRenderer(name, size, dpr, antialiasing, strategy)
+                renderer.render(value, images[slot][0])
+            connection.send([slot for slot, _, _ in batch])
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        _releaseImages(images)
+        memory.close()
+
+
+def _releaseImages(images: Dict[int, Tuple[QImage, memoryview]]) -> None:
+    # Les images d'abord, puis les vues : la mémoire partagée ne peut être fermée tant qu'une vue existe
+    views = [view for _, view in images.values()]
+    images.clear()
+    for view in views:
+        view.release()
+
+
+class SharedRenderPool(QObject):
+    # Les cadrans sont rendus par des processus de travail dans des images en mémoire partagée ;
+    # l'interface ne fait que les dessiner, sans copie.
+    # Deux images par compteur : l'interface affiche l'une pendant qu'un processus écrit l'autre, et ne les échange
+    # qu'une fois l'image terminée. Un seul rendu en cours par compteur, la dernière valeur reçue gagne
+    frameReady = Signal(int)
+
+    def __init__(self, size: int = DEFAULT_SIZE, capacity: int = DEFAULT_CAPACITY, workers: Optional[int] = None,
+                 dpr: float = 1.0, antialiasing: bool = True, strategy: str = "Pixmap",
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.__size = size
+        self.__dpr = dpr
+        self.__capacity = capacity
+        width = int(size * dpr)
+        self.__frameBytes = width * width * 4
+
+        self.__memory = shared_memory.SharedMemory(create=True, size=2 * capacity * self.__frameBytes)
+        self.__images: Dict[int, Tuple[QImage, memoryview]] = {}
+
+        # Par compteur : widget rendu, image affichée (0 ou 1, None avant la première), valeur en attente
+        self.__names: List[str] = []
+        self.__front: List[Optional[int]] = []
+        self.__values: list = []
+        self.__dirty = set()
+        # Compteur en cours de rendu -> processus qui le rend
+        self.__inFlight: Dict[int, int] = {}
+
+        # spawn : un processus issu d'un fork hériterait d'un état Qt inutilisable
+        context = multiprocessing.get_context("spawn")
+        self.__connections = []
+        self.__processes = []
+        self.__notifiers = []
+        self.__alive: List[int] = []
+        for _ in range(workers or os.cpu_count() or 1):
+            connection, child = context.Pipe()
+            process = context.Process(target=_serve, daemon=True,
+                                      args=(child, self.__memory.name, self.__frameBytes, size, dpr, antialiasing,
+                                            strategy))
+            process.start()
+            child.close()
+
+            # Les réponses sont lues par la boucle d'événements, sans thread ni attente active
+            notifier = QSocketNotifier(connection.fileno(), QSocketNotifier.Read, self)
+            notifier.activated.connect(lambda *args, worker=len(self.__connections): self.__receive(worker))
+            self.__connections.append(connection)
+            self.__processes.append(process)
+            self.__notifiers.append(notifier)
+            self.__alive.append(len(self.__alive))
+
+        # Les valeurs reçues pendant un tour de boucle partent ensemble, en un lot par processus
+        self.__flushTimer = QTimer(self)
+        self.__flushTimer.setSingleShot(True)
+        self.__flushTimer.timeout.connect(self.__flush)
+
+        # La mémoire partagée survit au processus si elle n'est pas libérée explicitement
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def size(self) -> int:
+        return self.__size
+
+    def devicePixelRatio(self) -> float:
+        return self.__dpr
+
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def workers(self) -> int:
+        # Processus de rendu encore en vie
+        return len(self.__alive)
+
+    def gaugeCount(self) -> int:
+        return len(self.__names)
+
+    def addGauge(self, name: str, value) -> int:
+        # `name` : SpeedWidget, ClockWidget ou CompassWidget ; `value` est rendue aussitôt
+        if len(self.__names) >= self.__capacity:
+            raise ValueError("the pool is full")
+        self.__names.append(name)
+        self.__front.append(None)
+        self.__values.append(None)
+        index = len(self.__names) - 1
+        self.setValue(index, value)
+        return index
+
+    def setValue(self, index: int, value) -> None:
+        self.__values[index] = value
+        self.__dirty.add(index)
+        if not self.__flushTimer.isActive():
+            self.__flushTimer.start(0)
+
+    def image(self, index: int) -> Optional[QImage]:
+        # Dernière image terminée du compteur, None avant la première ; valable jusqu'au prochain frameReady
+        front = self.__front[index]
+        if front is None:
+            return None
+        slot = 2 * index + front
+        if slot not in self.__images:
+            self.__images[slot] = _frameImage(self.__memory.buf, slot, self.__frameBytes,
+                                              int(self.__size * self.__dpr), self.__dpr)
+        return self.__images[slot][0]
+
+    def isIdle(self) -> bool:
+        # Vrai quand toutes les valeurs reçues sont affichables
+        return not self.__dirty and not self.__inFlight
+
+    def close(self) -> None:
+        if self.__memory is None:
+            return
+        self.__flushTimer.stop()
+        for notifier in self.__notifiers:
+            notifier.setEnabled(False)
+        for connection in self.__connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        # Un processus bloqué ne doit pas empêcher l'application de se fermer
+        for process in self.__processes:
+            process.join(CLOSE_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join(CLOSE_TIMEOUT)
+            if process.is_alive():
+                # Un processus suspendu ignore SIGTERM
+                process.kill()
+                process.join()
+        for connection in self.__connections:
+            connection.close()
+
+        _releaseImages(self.__images)
+        self.__memory.close()
+        self.__memory.unlink()
+        self.__memory = None
+
+    def __flush(self) -> None:
+        # Le compteur i est toujours rendu par le même processus vivant, qui garde son cadran en cache
+        # Un compteur déjà en cours de rendu attend la réponse : il repartira avec sa dernière valeur
+        ready = self.__dirty.difference(self.__inFlight)
+        self.__dirty -= ready
+        if not self.__alive:
+            # Plus aucun processus : les valeurs ne seront jamais rendues
+            return
+
+        batches = {worker: [] for worker in self.__alive}
+        for index in ready:
+            worker = self.__alive[index % len(self.__alive)]
+            back = 0 if self.__front[index] == 1 else 1
+            batches[worker].append((2 * index + back, self.__names[index], self.__values[index]))
+            self.__inFlight[index] = worker
+
+        for worker, batch in batches.items():
+            if batch:
+                try:
+                    self.__connections[worker].send(batch)
+                except OSError:
+                    self.__lost(worker)
+
+    def __receive(self, worker: int) -> None:
+        connection = self.__connections[worker]
+        while connection.poll():
+            try:
+                slots = connection.recv()
+            except (EOFError, OSError):
+                self.__lost(worker)
+                return
+            for slot in slots:
+                # Échange : l'image terminée devient l'image affichée
+                index = slot // 2
+                self.__front[index] = slot % 2
+                self.__inFlight.pop(index, None)
+                self.frameReady.emit(index)
+
+        # Valeurs arrivées pendant le rendu
+        if self.__dirty and not self.__flushTimer.isActive():
+            self.__flushTimer.start(0)
+
+    def __lost(self, worker: int) -> None:
+        # Processus mort : ses compteurs en cours repartent vers les processus restants
+        self.__notifiers[worker].setEnabled(False)
+        if worker not in self.__alive:
+            return
+        self.__alive.remove(worker)
+        orphans = [index for index, owner in self.__inFlight.items() if owner == worker]
+        for index in orphans:
+            del self.__inFlight[index]
+        self.__dirty.update(orphans)
+        if self.__dirty and not self.__flushTimer.isActive():
+            self.__flushTimer.start(0)
+
+
+class SharedDashboardWidget(GaugeWidget):
+    # Grille de compteurs rendus hors du processus : la peinture se limite à dessiner les images terminées
+
+    def __init__(self, pool: SharedRenderPool, columns: Optional[int] = None):
+        super().__init__()
+        self.__pool = pool
+        self.__columns = columns
+
+        self.__scheduler = UpdateScheduler(self)
+        self.__paintStats = None
+
+        pool.frameReady.connect(self.__frameReady)
+
+    def pool(self) -> SharedRenderPool:
+        return self.__pool
+
+    def updateScheduler(self) -> UpdateScheduler:
+        return self.__scheduler
+
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
+
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        self.__paintStats = stats
+
+    def gaugeCount(self) -> int:
+        return self.__pool.gaugeCount()
+
+    def addGauge(self, name: str, value) -> int:
+        index = self.__pool.addGauge(name, value)
+        self.updateGeometry()
+        self.update()
+        return index
+
+    def setValue(self, index: int, value) -> None:
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+        self.__pool.setValue(index, value)
+
+    def columns(self) -> int:
+        if self.__columns is not None:
+            return self.__columns
+        return max(1, math.ceil(math.sqrt(self.gaugeCount())))
+
+    def rows(self) -> int:
+        return max(1, math.ceil(self.gaugeCount() / self.columns()))
+
+    def cellRect(self, index: int) -> QRect:
+        # Les images ont une taille fixe, celle du pool
+        size = self.__pool.size()
+        return QRect(index % self.columns() * size, index // self.columns() * size, size, size)
+
+    def sizeHint(self) -> QSize:
+        return QSize(self.columns() * self.__pool.size(), self.rows() * self.__pool.size())
+
+    def __frameReady(self, index: int) -> None:
+        self.__scheduler.requestUpdate(self.cellRect(index))
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        for index in range(self.gaugeCount()):
+            rect = self.cellRect(index)
+            if not region.intersects(rect):
+                continue
+            image = self.__pool.image(index)
+            if image is not None:
+                painter.drawImage(rect.topLeft(), image)
+
+        self.__scheduler.paintPerformed()
+
+
+class MainWindow(QMainWindow):
+
+    def __init__(self, count: int, workers: Optional[int]):
+        super().__init__()
+        self.setWindowTitle("Example of a wall of gauges rendered by worker processes")
+
+        self.__pool = SharedRenderPool(capacity=count, workers=workers, parent=self)
+        self.__wall = SharedDashboardWidget(self.__pool)
+        self.__names = [["SpeedWidget", "CompassWidget"][index % 2] for index in range(count)]
+        for index, name in enumerate(self.__names):
+            self.__wall.addGauge(name, 0)
+        self.setCentralWidget(self.__wall)
+        self.resize(self.__wall.sizeHint())
+
+        self.__step = 0
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.__tick)
+        self.__timer.start(16)
+
+    def __tick(self) -> None:
+        self.__step += 1
+        for index, name in enumerate(self.__names):
+            if name == "SpeedWidget":
+                self.__wall.setValue(index, abs((self.__step + index * 7) % 640 - 320))
+            else:
+                self.__wall.setValue(index, (self.__step * 2 + index * 13) % 360)
+
+    def closeEvent(self, event) -> None:
+        self.__timer.stop()
+        self.__pool.close()
+        super().closeEvent(event)
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    window = MainWindow(count, workers)
+    window.show()
+
+    sys.exit(app.exec())
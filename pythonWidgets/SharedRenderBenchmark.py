@@ -0,0 +1,165 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Le banc de mesure tourne sans affichage : le mur de compteurs est rendu dans une QImage
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QPoint
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QApplication
+
+from .BatchRender import FrameRenderer
+from .SharedRender import FRAME_FORMAT, SharedDashboardWidget, SharedRenderPool
+
+DEFAULT_COUNTS = [16, 64, 256]
+DEFAULT_FRAMES = 30
+DEFAULT_WARMUP = 3
+DEFAULT_SIZE = 100
+
+# Les trois cadrans en alternance, chacun avec une valeur différente à chaque image
+NAMES = ["SpeedWidget", "CompassWidget", "ClockWidget"]
+EPOCH = datetime(2024, 1, 1)
+
+
+def gaugeValue(name: str, index: int, frame: int):
+    if name == "SpeedWidget":
+        return abs((frame * 3 + index * 7) % 640 - 320)
+    if name == "CompassWidget":
+        return (frame * 5 + index * 13) % 360
+    return EPOCH + timedelta(seconds=frame + index * 97)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[round((len(ordered) - 1) * 0.5)],
+        "p90": ordered[round((len(ordered) - 1) * 0.9)],
+        "max": ordered[-1],
+    }
+
+
+def measureInProcess(count: int, size: int, frames: int, warmup: int) -> dict:
+    # Référence : l'interface rend elle-même chaque compteur, puis compose le mur
+    renderers = {name: FrameRenderer(name, size) for name in NAMES}
+    images = [QImage(size, size, FRAME_FORMAT) for _ in range(count)]
+    columns = max(1, math.ceil(math.sqrt(count)))
+    wall = QImage(columns * size, -(-count // columns) * size, QImage.Format_ARGB32_Premultiplied)
+
+    def frame(step: int) -> None:
+        for index in range(count):
+            name = NAMES[index % len(NAMES)]
+            renderers[name].render(gaugeValue(name, index, step), images[index])
+        painter = QPainter(wall)
+        for index, image in enumerate(images):
+            painter.drawImage(QPoint(index % columns * size, index // columns * size), image)
+        painter.end()
+
+    return timeFrames(frame, frames, warmup)
+
+
+def measureShared(count: int, workers: int, size: int, frames: int, warmup: int) -> dict:
+    app = QApplication.instance()
+    start = time.perf_counter()
+    pool = SharedRenderPool(size, count, workers)
+    widget = SharedDashboardWidget(pool)
+    for index in range(count):
+        name = NAMES[index % len(NAMES)]
+        widget.addGauge(name, gaugeValue(name, index, 0))
+    widget.resize(widget.sizeHint())
+    wall = QImage(widget.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def settle() -> None:
+        # Attente bloquante : le temps passé à attendre les processus ne compte pas comme temps CPU de l'interface
+        while not pool.isIdle():
+            app.processEvents(QEventLoop.WaitForMoreEvents)
+
+    settle()
+    startup = (time.perf_counter() - start) * 1000
+
+    def frame(step: int) -> None:
+        for index in range(count):
+            name = NAMES[index % len(NAMES)]
+            widget.setValue(index, gaugeValue(name, index, step))
+        settle()
+        painter = QPainter(wall)
+        widget.render(painter, QPoint())
+        painter.end()
+
+    try:
+        result = timeFrames(frame, frames, warmup)
+    finally:
+        pool.close()
+        widget.deleteLater()
+    result["startupMs"] = startup
+    return result
+
+
+def timeFrames(frame, frames: int, warmup: int) -> dict:
+    # Une image = toutes les valeurs changent, tous les compteurs sont rendus puis composés
+    for step in range(warmup):
+        frame(step)
+
+    cpu = []
+    elapsed = []
+    for step in range(warmup, warmup + frames):
+        startCpu = time.thread_time()
+        start = time.perf_counter()
+        frame(step)
+        elapsed.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.thread_time() - startCpu) * 1000)
+
+    return {
+        "guiCpuMs": summarize(cpu),
+        "frameMs": summarize(elapsed),
+        "framesPerSecond": 1000 / statistics.fmean(elapsed),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GUI thread time of a wall of gauges rendered by worker processes")
+    parser.add_argument("--counts", nargs="+", type=int, default=DEFAULT_COUNTS)
+    parser.add_argument("--workers", nargs="+", type=int,
+                        help="worker process counts, 1 2 4 and one per core by default; 0 renders in process")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers if args.workers is not None else sorted({0, 1, 2, 4, cpus})
+
+    app = QApplication.instance() or QApplication([])
+    results = []
+    for count in args.counts:
+        for workerCount in workers:
+            if workerCount == 0:
+                result = measureInProcess(count, args.size, args.frames, args.warmup)
+            else:
+                result = measureShared(count, workerCount, args.size, args.frames, args.warmup)
+            results.append({"count": count, "workers": workerCount, **result})
+            app.processEvents()
+
+    report = {"python": sys.version.split()[0], "cpus": cpus, "size": args.size, "frames": args.frames,
+              "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
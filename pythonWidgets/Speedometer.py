@@ -1,187 +1,400 @@
 import math
 import sys
+import time
+from typing import TYPE_CHECKING, Optional
 
-from PySide6.QtGui import QPainter, QColor, QLinearGradient, QPen
-from PySide6.QtCore import QPoint, Qt, QPointF, Slot
-from PySide6.QtGui import QPaintEvent
+from PySide6.QtGui import QPainter, QColor, QPen, QBrush
+from PySide6.QtCore import Qt, Slot, QEvent, QTimer
+from PySide6.QtGui import QRegion
 from PySide6.QtWidgets import QWidget, QApplication, QMainWindow, QHBoxLayout, QSlider, QVBoxLayout, QCheckBox
 
+from .Animation import AnimationDriver, NeedleDynamics
+from .DialSpec import Caption, Detail, DialRenderer, DialSpec, Labels, Needle, RenderStrategy, Ring, Scale, Ticks, Trace, Values
+from .GaugeWidget import GaugeWidget, paintRatio
+from .PaintStats import PaintStats
+from .Theme import DEFAULT_THEME, resources
+from .UpdateScheduler import UpdateScheduler
+
+# Historique et télémétrie ne sont chargés que par l'application qui les fournit au compteur
+if TYPE_CHECKING:
+    from .History import SampleHistory
+    from .Telemetry import Reduction, TelemetryBuffer
+
 MAX_SPEED = 320
+ANGLE_START = -5 * math.pi / 4
+
+# De 0 à MAX_SPEED sur 240 degrés
+SPEED_SCALE = Scale(0, MAX_SPEED, ANGLE_START, 240)
+
+
+def speedToAngle(speed: float) -> float:
+    return SPEED_SCALE.angle(speed)
+
+
+# Graduations tous les 20, 10 et 2 km/h, calculées une fois pour toutes
+MAJOR_TICKS = SPEED_SCALE.table(range(0, MAX_SPEED + 1, 20))
+MEDIUM_TICKS = SPEED_SCALE.table(range(10, MAX_SPEED + 1, 20))
+MINOR_TICKS = SPEED_SCALE.table([speed for speed in range(0, MAX_SPEED + 1, 2) if speed % 10])
+
+# Stylos et pinceaux construits une seule fois et réutilisés à chaque peinture
+MAJOR_PEN = QPen(Qt.white, 3)
+MEDIUM_PEN = QPen(Qt.white, 2)
+MINOR_PEN = QPen(Qt.gray, 1)
+LABEL_PEN = QPen(Qt.white)
+DIAL_BRUSH = resources.brush(DEFAULT_THEME.colors["dial"])
+NEEDLE_PEN = QPen(QColor(255, 0, 0))
+NEEDLE_BRUSH = QBrush(QColor(255, 0, 0, 150))
+LIMITER_PEN = QPen(QColor(0xfd, 0x56, 0x02))
+LIMITER_BRUSH = QBrush(QColor(0xfd, 0x56, 0x02, 200))
+PEAK_PEN = QPen(QColor(0xff, 0xd7, 0x00))
+PEAK_BRUSH = QBrush(QColor(0xff, 0xd7, 0x00, 200))
+TRACE_PEN = QPen(QColor(255, 0, 0, 140), 2)
+
+# Points de la trace d'historique, et intervalle en ms entre deux peintures qui la font glisser sans nouvelle valeur
+TRACE_POINTS = 48
+TRACE_INTERVAL = 100
+
+
+def speedRing(inner: float, outer: float) -> tuple:
+    # Une seule série de traits par style de graduation
+    return (Ticks(MINOR_TICKS, inner, outer, MINOR_PEN),
+            Ticks(MEDIUM_TICKS, inner, outer, MEDIUM_PEN),
+            Ticks(MAJOR_TICKS, inner, outer, MAJOR_PEN))
+
+
+SPEED_DIAL = DialSpec(0.95, (
+    Ring(1, DIAL_BRUSH, gradient="bezel"),
+    # Graduations externes et leurs valeurs
+    *speedRing(0.92, 0.95),
+    Labels(MAJOR_TICKS, tuple(str(speed) for speed in range(0, MAX_SPEED + 1, 20)), 0.8, 20, -24, 0.03, LABEL_PEN),
+    # Disque interne et ses graduations
+    Ring(0.64, DIAL_BRUSH, gradient="innerBezel"),
+    *speedRing(0.62, 0.66),
+    # Trace des dernières secondes sous l'aiguille de vitesse, marqueurs du limiteur et du maximum récent
+    Trace("trace", speedToAngle, 0.2, 0.6, TRACE_PEN),
+    Needle(speedToAngle, 0.93, 0.1, 0.4, NEEDLE_PEN, NEEDLE_BRUSH, channel="speed"),
+    Needle(speedToAngle, 0.95, 1, 0.03, LIMITER_PEN, LIMITER_BRUSH, channel="limiter"),
+    Needle(speedToAngle, 0.91, 0.85, 0.04, PEAK_PEN, PEAK_BRUSH, channel="peak"),
+    # Disque le plus interne
+    Caption("Km/h", -20, 0.65, 20, LABEL_PEN),
+    Ring(0.18, DIAL_BRUSH, gradient="bezel"),
+))
+
+
+class SpeedModel:
+    # Valeurs affichées par un compteur, indépendantes de tout widget ; sans __dict__, une instance reste minuscule
+    __slots__ = ("__speed", "__maxSpeed", "__limiter")
+
+    def __init__(self, speed: int = 0, maxSpeed: int = 130, limiter: bool = False):
+        self.__speed = speed
+        self.__maxSpeed = maxSpeed
+        self.__limiter = limiter
+
+    def speed(self) -> int:
+        return self.__speed
+
+    def maxSpeed(self) -> int:
+        return self.__maxSpeed
+
+    def limiter(self) -> bool:
+        return self.__limiter
+
+    # Les setters renvoient True si la valeur affichée a changé
+
+    def setSpeed(self, speed: int) -> bool:
+        if self.__limiter and speed > self.__maxSpeed:
+            speed = self.__maxSpeed
+        if speed == self.__speed:
+            return False
+        self.__speed = speed
+        return True
+
+    def setMaxSpeed(self, speed: int) -> bool:
+        if speed == self.__maxSpeed:
+            return False
+        self.__maxSpeed = speed
+        if self.__speed > self.__maxSpeed:
+            self.__speed = self.__maxSpeed
+        return True
+
+    def setLimiter(self, value: bool) -> bool:
+        if value == self.__limiter:
+            return False
+        self.__limiter = value
+        if value and self.__speed > self.__maxSpeed:
+            self.__speed = self.__maxSpeed
+        return True
+
+
+def speedValues(model: SpeedModel, speed: Optional[float] = None) -> Values:
+    # Canaux du cadran ; `speed` remplace la valeur du modèle quand l'aiguille est animée vers celle-ci
+    values = {"speed": model.speed() if speed is None else speed}
+    if model.limiter():
+        values["limiter"] = model.maxSpeed()
+    return values
 
 
-class SpeedWidget(QWidget):
+class SpeedWidget(GaugeWidget):
 
     def __init__(self):
         super().__init__()
-        self.__speed = 0
-        self.__maxSpeed = 130
-        self.__limiter = False
+        self.__model = SpeedModel()
+        self.__antialiasing = True
+
+        # Plan de rendu du cadran, fond et moyeu partagés avec les compteurs de même taille
+        self.__dial = DialRenderer(SPEED_DIAL)
+
+        # Regroupe les changements de valeur en une peinture par image
+        self.__scheduler = UpdateScheduler(self)
+        self.__paintStats = None
+
+        # Source optionnelle d'échantillons poussés depuis un autre thread
+        self.__telemetry = None
+        self.__reduction = None
+
+        # En mode animé, setSpeed fixe une cible que l'aiguille rejoint à la cadence de l'écran
+        self.__animated = False
+        self.__needle = NeedleDynamics()
+
+        # Historique optionnel des vitesses affichées, et timer qui repeint quand le maximum sort de la fenêtre
+        self.__history = None
+        self.__historyTimer = None
+        self.__peakMarker = True
+        self.__historyTrace = True
+
+    def model(self) -> SpeedModel:
+        return self.__model
+
+    def updateScheduler(self) -> UpdateScheduler:
+        return self.__scheduler
+
+    def paintStats(self) -> Optional[PaintStats]:
+        return self.__paintStats
+
+    def setPaintStats(self, stats: Optional[PaintStats]) -> None:
+        # Instrumentation optionnelle des peintures, désactivée par défaut
+        self.__paintStats = stats
 
     @Slot(int)
     def setSpeed(self, speed: int):
-        self.__speed = speed
-        if self.__limiter and self.__speed > self.__maxSpeed:
-            self.__speed = self.__maxSpeed
-        self.repaint()
+        # Inutile de repeindre si la valeur affichée ne change pas, mais l'échantillon compte pour l'historique
+        changed = self.__model.setSpeed(speed)
+        self.__record()
+        self.__changed(changed)
 
     @Slot(int)
     def setMaxSpeed(self, speed: int):
-        self.__maxSpeed = speed
-        if self.__speed > self.__maxSpeed:
-            self.__speed = self.__maxSpeed
-        self.repaint()
+        changed = self.__model.setMaxSpeed(speed)
+        if changed:
+            self.__record()
+        self.__changed(changed)
 
     @Slot(bool)
     def setLimiter(self, value: bool):
-        self.__limiter = value
-        if value and self.__speed > self.__maxSpeed:
-            self.__speed = self.__maxSpeed
-        self.repaint()
-
-    def paintEvent(self, event: QPaintEvent) -> None:
-        super().paintEvent(event)
-
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        radius = 0.95 * (min(self.width(), self.height()) / 2)
-
-        centerX = int(self.width() / 2)
-        centerY = int(self.height() / 2)
-        # print("Center", centerX, centerY)
-
-        linearGradient = QLinearGradient(QPointF(0, 0), QPointF(0, radius*2))
-        linearGradient.setColorAt(0, QColor(0xE0, 0xE0, 0xE0))
-        linearGradient.setColorAt(0.5, QColor(0x6E, 0x77, 0x74))
-        linearGradient.setColorAt(0.51, QColor(0x0a, 0x0e, 0x0a))
-        linearGradient.setColorAt(1, QColor(0x0a, 0x08, 0x09))
-
-        linearGradient2 = QLinearGradient(QPointF(0, 0), QPointF(0, radius*2))
-        linearGradient2.setColorAt(0, QColor(0x21, 0x21, 0x21))
-        linearGradient2.setColorAt(1, QColor(0x0a, 0x08, 0x09))
-
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius, radius)
-
-        font = painter.font()
-        font.setPointSize(20)
-        painter.setFont(font)
-
-        # On trace les graduations externes
-        angleStart = -5 * math.pi / 4
-        for speed in range(0, MAX_SPEED + 1, 2):
-            angle = angleStart + math.radians(speed / MAX_SPEED * 240)
-
-            painter.setPen(Qt.white)
-            painter.setBrush(Qt.white)
-
-            if speed % 20 == 0:
-                painter.setPen(QPen(Qt.white, 3))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.92,
-                            centerY + math.sin(angle) * radius * 0.92),
-                    QPointF(centerX + math.cos(angle) * radius * 0.95,
-                            centerY + math.sin(angle) * radius * 0.95)
-                )
-
-                delta = radius * 0.03
-                painter.drawText(int(centerX + math.cos(angle) * radius * 0.8) - 24,
-                                 int(centerY + math.sin(angle) * radius * 0.8 + delta),
-                                 str(speed))
-            elif speed % 10 == 0:
-                painter.setPen(QPen(Qt.white, 2))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.92,
-                            centerY + math.sin(angle) * radius * 0.92),
-                    QPointF(centerX + math.cos(angle) * radius * 0.95,
-                            centerY + math.sin(angle) * radius * 0.95)
-                )
-
-            else:
-                painter.setPen(QPen(Qt.gray, 1))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.92,
-                            centerY + math.sin(angle) * radius * 0.92),
-                    QPointF(centerX + math.cos(angle) * radius * 0.95,
-                            centerY + math.sin(angle) * radius * 0.95)
-                )
-
-        # On dessine le disque interne et ses graduation
-        painter.setPen(QPen(linearGradient2, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius * 0.64, radius * 0.64)
-
-        for speed in range(0, MAX_SPEED + 1, 2):
-            angle = angleStart + math.radians(speed / MAX_SPEED * 240)
-
-            painter.setPen(Qt.white)
-            painter.setBrush(Qt.white)
-
-            if speed % 20 == 0:
-                painter.setPen(QPen(Qt.white, 3))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.62,
-                            centerY + math.sin(angle) * radius * 0.62),
-                    QPointF(centerX + math.cos(angle) * radius * 0.66,
-                            centerY + math.sin(angle) * radius * 0.66)
-                )
-
-            elif speed % 10 == 0:
-                painter.setPen(QPen(Qt.white, 2))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.62,
-                            centerY + math.sin(angle) * radius * 0.62),
-                    QPointF(centerX + math.cos(angle) * radius * 0.66,
-                            centerY + math.sin(angle) * radius * 0.66)
-                )
-
-            else:
-                painter.setPen(QPen(Qt.gray, 1))
-                painter.drawLine(
-                    QPointF(centerX + math.cos(angle) * radius * 0.62,
-                            centerY + math.sin(angle) * radius * 0.62),
-                    QPointF(centerX + math.cos(angle) * radius * 0.66,
-                            centerY + math.sin(angle) * radius * 0.66)
-                )
-
-        # On dessine l'aiguille de vitesse
-        painter.setPen(QColor(255, 0, 0))
-        painter.setBrush(QColor(255, 0, 0, 150))
-
-        angle = angleStart + math.radians(self.__speed / MAX_SPEED * 240)
-
-        painter.drawPolygon([
-            QPointF(centerX + math.cos(angle) * radius * 0.93, centerY + math.sin(angle) * radius * 0.93),
-            QPointF(centerX + math.cos(angle - 0.4) * radius * 0.1, centerY + math.sin(angle - 0.4) * radius * 0.1),
-            QPointF(centerX + math.cos(angle + 0.4) * radius * 0.1, centerY + math.sin(angle + 0.4) * radius * 0.1)
-        ])
-
-        # Doit-on afficher le marqueur pour le limiteur de vitesse
-        if self.__limiter:
-            angle = angleStart + math.radians(self.__maxSpeed / MAX_SPEED * 240)
-
-            painter.setPen(QColor(0xfd, 0x56, 0x02))
-            painter.setBrush(QColor(0xfd, 0x56, 0x02, 200))
-
-            painter.drawPolygon([
-                QPointF(centerX + math.cos(angle) * radius * 0.95, centerY + math.sin(angle) * radius * 0.95),
-                QPointF(centerX + math.cos(angle - 0.03) * radius, centerY + math.sin(angle - 0.03) * radius),
-                QPointF(centerX + math.cos(angle + 0.03) * radius, centerY + math.sin(angle + 0.03) * radius)
-            ])
-
-        painter.setPen(Qt.white)
-        painter.drawText(centerX - 20, int(self.height() * 0.65), "Km/h")
-
-        # On dessine le disque le plus interne
-        painter.setPen(QPen(linearGradient, 8))
-        painter.setBrush(QColor(0x21, 0x21, 0x21))
-        painter.drawEllipse(QPoint(centerX, centerY), radius * 0.18, radius * 0.18)
+        changed = self.__model.setLimiter(value)
+        if changed:
+            self.__record()
+        self.__changed(changed)
+
+    def history(self) -> Optional["SampleHistory"]:
+        return self.__history
+
+    def setHistory(self, history: Optional["SampleHistory"]) -> None:
+        # Chaque vitesse reçue y est ajoutée, horodatée ; le widget affiche son maximum récent et sa trace
+        self.__history = history
+        if history is not None:
+            if self.__historyTimer is None:
+                self.__historyTimer = QTimer(self)
+                self.__historyTimer.setSingleShot(True)
+                self.__historyTimer.timeout.connect(self.__scheduler.requestUpdate)
+            self.__record()
+        elif self.__historyTimer is not None:
+            self.__historyTimer.stop()
+        self.update()
+
+    def peakMarker(self) -> bool:
+        return self.__peakMarker
+
+    def setPeakMarker(self, value: bool) -> None:
+        # Marqueur du maximum des `window` dernières secondes de l'historique
+        self.__peakMarker = value
+        self.update()
+
+    def historyTrace(self) -> bool:
+        return self.__historyTrace
+
+    def setHistoryTrace(self, value: bool) -> None:
+        # Vitesses des `window` dernières secondes, de l'intérieur du cadran vers l'aiguille
+        self.__historyTrace = value
+        self.update()
+
+    def __record(self) -> None:
+        if self.__history is not None:
+            self.__history.append(time.monotonic(), self.__model.speed())
+
+    def telemetry(self) -> Optional["TelemetryBuffer"]:
+        return self.__telemetry
+
+    def setTelemetry(self, buffer: Optional["TelemetryBuffer"], reduction: Optional["Reduction"] = None) -> None:
+        # Les échantillons sont lus une fois par image, réduits selon `reduction`, Reduction.Last par défaut
+        from .Telemetry import Reduction
+
+        if reduction is None:
+            reduction = Reduction.Last
+        if self.__telemetry is not None:
+            self.__telemetry.available.disconnect(self.__telemetryAvailable)
+
+        self.__telemetry = buffer
+        self.__reduction = reduction
+        if buffer is not None:
+            buffer.available.connect(self.__telemetryAvailable, Qt.QueuedConnection)
+            self.__telemetryAvailable()
+
+    def __telemetryAvailable(self) -> None:
+        # La valeur ne sera connue qu'au moment de peindre
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+        self.__scheduler.requestUpdate()
+
+    def __sampleTelemetry(self) -> None:
+        window = self.__telemetry.take()
+        if window is None:
+            return
+        changed = self.__model.setSpeed(window.value(self.__reduction))
+        self.__record()
+        if changed:
+            self.__retarget()
+
+    def isAnimated(self) -> bool:
+        return self.__animated
+
+    def setAnimated(self, value: bool) -> None:
+        if value == self.__animated:
+            return
+        self.__animated = value
+
+        # Dans les deux cas l'aiguille repart de la valeur courante
+        self.__needle.jump(self.__model.speed())
+        if not value:
+            AnimationDriver.instance().stop(self)
+            self.update()
+
+    def damping(self) -> float:
+        return self.__needle.damping
+
+    def setDamping(self, damping: float) -> None:
+        # 1 pour un amortissement critique, moins pour laisser l'aiguille dépasser sa cible
+        if damping <= 0:
+            raise ValueError("damping must be positive")
+        self.__needle.damping = damping
+
+    def frequency(self) -> float:
+        return self.__needle.frequency
+
+    def setFrequency(self, frequency: float) -> None:
+        # Pulsation propre en rad/s : plus elle est élevée, plus l'aiguille est vive
+        if frequency <= 0:
+            raise ValueError("frequency must be positive")
+        self.__needle.frequency = frequency
+
+    def displayedSpeed(self) -> float:
+        if self.__animated:
+            return self.__needle.value
+        return self.__model.speed()
+
+    def __retarget(self) -> None:
+        if not self.__animated or self.__needle.target == self.__model.speed():
+            return
+        self.__needle.target = self.__model.speed()
+        AnimationDriver.instance().start(self, self.__animate)
+
+    def __animate(self, elapsed: float) -> bool:
+        moving = self.__needle.step(elapsed)
+        self.__scheduler.requestUpdate()
+        return moving
+
+    def __changed(self, changed: bool) -> None:
+        if not changed:
+            if self.__paintStats is not None:
+                self.__paintStats.markDropped()
+            return
+
+        if self.__paintStats is not None:
+            self.__paintStats.markRequested()
+        self.__retarget()
+        self.__scheduler.requestUpdate()
+
+    def antialiasing(self) -> bool:
+        return self.__antialiasing
+
+    def setAntialiasing(self, value: bool) -> None:
+        if value == self.__antialiasing:
+            return
+        self.__antialiasing = value
+        self.invalidateCache()
+
+    def renderStrategy(self) -> RenderStrategy:
+        return self.__dial.strategy()
+
+    def setRenderStrategy(self, strategy: RenderStrategy) -> None:
+        # Pixmap : blit le plus rapide ; Picture : liste d'affichage rejouée à l'échelle, mémoire constante
+        self.__dial.setStrategy(strategy)
+        self.update()
+
+    def invalidateCache(self) -> None:
+        # À appeler après un changement de thème ; les calques partagés sont indexés sur la police
+        self.__dial.invalidate()
+        self.update()
+
+    def changeEvent(self, event: QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange, QEvent.FontChange):
+            self.invalidateCache()
+
+    def paintGauge(self, painter: QPainter, region: QRegion) -> None:
+        if self.__telemetry is not None:
+            self.__sampleTelemetry()
+
+        detail = self.detail()
+        values = speedValues(self.__model, self.__needle.value if self.__animated else None)
+        if self.__history is not None and len(self.__history):
+            self.__historyValues(values, detail)
+
+        # Le cadran statique n'est redessiné que si la taille ou le DPR de la cible change
+        dpr = paintRatio(painter)
+        self.__dial.paint(painter, self.width(), self.height(), dpr, self.__antialiasing,
+                          self.font(), values, detail)
+
+        self.__scheduler.paintPerformed()
+
+    def __historyValues(self, values: Values, detail: Detail) -> None:
+        history = self.__history
+        now = time.monotonic()
+        history.expire(now)
+
+        # Sans nouvelle valeur, on ne repeint que pour faire glisser la trace ou retirer un maximum périmé
+        delay = None
+        if self.__peakMarker:
+            values["peak"] = history.peak()
+            if history.peak() > history.last():
+                delay = max(0, math.ceil((history.peakTime() + history.window() - now) * 1000))
+        # Au niveau Minimal, la trace n'est pas dessinée
+        if self.__historyTrace and detail is not Detail.Minimal:
+            values["trace"] = history.trace(now, TRACE_POINTS)
+            if len(history) > 1 and history.lastTime() > now - history.window():
+                delay = TRACE_INTERVAL if delay is None else min(delay, TRACE_INTERVAL)
+
+        if delay is None:
+            self.__historyTimer.stop()
+        else:
+            self.__historyTimer.start(delay)
 
 
 class MainWindow(QMainWindow):
 
     def __init__(self):
+        from .History import SampleHistory
+
         super().__init__()
         self.setWindowTitle("Example of a speedometer design")
         self.resize(640, 600)
@@ -198,6 +411,7 @@ class MainWindow(QMainWindow):
         hBox.addWidget(slider)
 
         chkLimiter = QCheckBox("Activate limiter")
+        chkHistory = QCheckBox("Peak hold and history")
         slider2 = QSlider(Qt.Horizontal)
         slider2.setMinimum(0)
         slider2.setValue(130)
@@ -205,6 +419,7 @@ class MainWindow(QMainWindow):
 
         hBox2 = QHBoxLayout()
         hBox2.addWidget(chkLimiter)
+        hBox2.addWidget(chkHistory)
         hBox2.addWidget(slider2)
 
         vBox = QVBoxLayout()
@@ -216,6 +431,7 @@ class MainWindow(QMainWindow):
 
         slider.valueChanged.connect(speedWidget.setSpeed)
         chkLimiter.stateChanged.connect(speedWidget.setLimiter)
+        chkHistory.toggled.connect(lambda checked: speedWidget.setHistory(SampleHistory() if checked else None))
         slider2.valueChanged.connect(speedWidget.setMaxSpeed)
 
 
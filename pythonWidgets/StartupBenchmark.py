@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_RUNS = 10
+DEFAULT_SIZE = 400
+FIRST_PAINT_TIMEOUT = 5.0
+
+WIDGETS = ["SpeedWidget", "ClockWidget", "CompassWidget", "DigitalClockWidget", "DashboardWidget"]
+
+# Exécuté dans un interpréteur neuf : chaque phase est chronométrée depuis la précédente
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+
+from PySide6.QtWidgets import QApplication
+qt = time.perf_counter()
+
+import pythonWidgets
+names = sys.argv[1].split(",")
+classes = [getattr(pythonWidgets, name) for name in names]
+widgets = time.perf_counter()
+
+from pythonWidgets.PaintStats import PaintStats
+app = QApplication([])
+application = time.perf_counter()
+
+widget = classes[0]()
+widget.resize(int(sys.argv[2]), int(sys.argv[2]))
+stats = PaintStats()
+widget.setPaintStats(stats)
+constructed = time.perf_counter()
+
+# Première image réellement servie par la boucle d'événements après show()
+widget.show()
+deadline = constructed + float(sys.argv[3])
+while not stats.paints and time.perf_counter() < deadline:
+    app.processEvents()
+painted = time.perf_counter()
+
+json.dump({
+    "qtImportMs": (qt - start) * 1000,
+    "widgetImportMs": (widgets - qt) * 1000,
+    "applicationMs": (application - widgets) * 1000,
+    "constructMs": (constructed - application) * 1000,
+    "firstPaintMs": (painted - constructed) * 1000,
+    "painted": bool(stats.paints),
+    "modules": len(sys.modules),
+    "packageModules": sorted(name for name in sys.modules if name.startswith("pythonWidgets.")),
+}, sys.stdout)
+"""
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[round((len(ordered) - 1) * 0.5)],
+        "p90": ordered[round((len(ordered) - 1) * 0.9)],
+        "max": ordered[-1],
+    }
+
+
+def measure(names: List[str], runs: int, size: int) -> dict:
+    # Un processus par mesure : rien n'est déjà importé, comme au démarrage d'une borne
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+
+    probes = []
+    totals = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", PROBE, ",".join(names), str(size), str(FIRST_PAINT_TIMEOUT)],
+                                cwd=root, env=env, check=True, capture_output=True, text=True).stdout
+        totals.append((time.perf_counter() - start) * 1000)
+        probes.append(json.loads(output))
+
+    phases = ["qtImportMs", "widgetImportMs", "applicationMs", "constructMs", "firstPaintMs"]
+    return {
+        "widgets": names,
+        "runs": runs,
+        "processMs": summarize(totals),
+        **{phase: summarize([probe[phase] for probe in probes]) for phase in phases},
+        "painted": all(probe["painted"] for probe in probes),
+        "modules": probes[-1]["modules"],
+        "packageModules": probes[-1]["packageModules"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import and first-paint latency of the widgets")
+    parser.add_argument("--widgets", nargs="+", choices=WIDGETS, default=WIDGETS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Chaque widget seul, puis tous ensemble pour mesurer ce que le chargement paresseux évite
+    results = [measure([name], args.runs, args.size) for name in args.widgets]
+    if len(args.widgets) > 1:
+        results.append(measure(args.widgets, args.runs, args.size))
+    report = {"python": sys.version.split()[0], "size": args.size, "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0 if all(result["painted"] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
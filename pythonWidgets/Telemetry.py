@@ -0,0 +1,80 @@
+import math
+import threading
+from enum import Enum
+from typing import NamedTuple, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+
+class Reduction(Enum):
+    # Dernière valeur reçue pendant la fenêtre (par défaut)
+    Last = 0
+    Minimum = 1
+    Maximum = 2
+    Mean = 3
+
+
+class TelemetryWindow(NamedTuple):
+    # Échantillons reçus depuis la dernière lecture par l'interface
+    last: float
+    minimum: float
+    maximum: float
+    mean: float
+    count: int
+
+    def value(self, reduction: Reduction) -> float:
+        if reduction is Reduction.Minimum:
+            return self.minimum
+        if reduction is Reduction.Maximum:
+            return self.maximum
+        if reduction is Reduction.Mean:
+            return self.mean
+        return self.last
+
+
+class TelemetryBuffer(QObject):
+    # Émis depuis le thread producteur au premier échantillon d'une fenêtre, reçu en file par l'interface
+    available = Signal()
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.__lock = threading.Lock()
+        self.__reset()
+
+        self.pushed = 0
+        self.notified = 0
+
+    def push(self, value: float) -> None:
+        # Utilisable depuis n'importe quel thread, à n'importe quel débit
+        with self.__lock:
+            self.__last = value
+            if value < self.__minimum:
+                self.__minimum = value
+            if value > self.__maximum:
+                self.__maximum = value
+            self.__sum += value
+            self.__count += 1
+            self.pushed += 1
+            first = self.__count == 1
+
+        # Un seul réveil de l'interface par fenêtre, quel que soit le nombre d'échantillons
+        if first:
+            self.notified += 1
+            self.available.emit()
+
+    def take(self) -> Optional[TelemetryWindow]:
+        # Lu par l'interface une fois par image ; None si rien n'est arrivé depuis la dernière lecture
+        with self.__lock:
+            if not self.__count:
+                return None
+            window = TelemetryWindow(self.__last, self.__minimum, self.__maximum,
+                                     self.__sum / self.__count, self.__count)
+            self.__reset()
+        return window
+
+    def __reset(self) -> None:
+        self.__last = 0.0
+        self.__minimum = math.inf
+        self.__maximum = -math.inf
+        self.__sum = 0.0
+        self.__count = 0
@@ -0,0 +1,312 @@
+import argparse
+import ast
+import bisect
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QApplication, QHBoxLayout, QMainWindow, QWidget
+
+from .Animation import AnimationDriver
+from .Telemetry import Reduction, TelemetryWindow
+
+# Échantillons par bloc de l'index : un horodatage et un résumé min/max/somme par bloc
+BLOCK_SIZE = 4096
+
+# Journal brut : couples (temps en secondes, valeur) en float64 petit-boutiste, sans en-tête
+RECORD = struct.Struct("<dd")
+
+NPY_MAGIC = b"\x93NUMPY"
+
+# Types NumPy acceptés -> format de memoryview
+NPY_TYPES = {"<f8": "d", "<f4": "f"}
+
+
+def writeLog(path: str, samples: Iterable[Tuple[float, float]]) -> int:
+    # Écrit un journal brut, horodatages croissants ; renvoie le nombre d'échantillons
+    count = 0
+    with open(path, "wb") as file:
+        for time, value in samples:
+            file.write(RECORD.pack(time, value))
+            count += 1
+    return count
+
+
+def _npyLayout(buffer: mmap.mmap) -> Tuple[int, str]:
+    # En-tête .npy : renvoie le décalage des données et le format d'un champ
+    major = buffer[6]
+    if major == 1:
+        length = struct.unpack_from("<H", buffer, 8)[0]
+        start = 10
+    else:
+        length = struct.unpack_from("<I", buffer, 8)[0]
+        start = 12
+    header = ast.literal_eval(buffer[start:start + length].decode("latin1"))
+
+    if header["fortran_order"]:
+        raise ValueError("Fortran ordered arrays are not supported")
+
+    descr = header["descr"]
+    shape = header["shape"]
+    if isinstance(descr, str):
+        # Tableau (n, 2) : temps et valeur côte à côte
+        if len(shape) != 2 or shape[1] != 2:
+            raise ValueError("expected an array of shape (n, 2)")
+        field = descr
+    else:
+        # Tableau structuré à deux champs de même type
+        if len(descr) != 2 or descr[0][1] != descr[1][1]:
+            raise ValueError("expected two fields of the same type")
+        field = descr[0][1]
+
+    # L'ordre natif "=" est petit-boutiste ici, comme l'exige TelemetryLog
+    if field.startswith("="):
+        field = "<" + field[1:]
+    if field not in NPY_TYPES:
+        raise ValueError("unsupported field type " + field)
+    return start + length, NPY_TYPES[field]
+
+
+class TelemetryLog:
+    # Journal (temps, valeur) projeté en mémoire : seules les pages lues sont chargées, quelle que soit sa taille.
+    # Les horodatages doivent être croissants.
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("telemetry logs are little endian")
+
+        self.__file = open(path, "rb")
+        try:
+            self.__buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.__file.close()
+            raise ValueError("empty telemetry log " + path) from None
+
+        offset, format = 0, "d"
+        if self.__buffer[:len(NPY_MAGIC)] == NPY_MAGIC:
+            offset, format = _npyLayout(self.__buffer)
+
+        # Vues sans copie : les temps aux indices pairs, les valeurs aux indices impairs
+        self.__view = memoryview(self.__buffer)[offset:]
+        itemSize = struct.calcsize(format)
+        usable = len(self.__view) // (2 * itemSize) * 2 * itemSize
+        flat = self.__view[:usable].cast(format)
+        self.__times = flat[0::2]
+        self.__values = flat[1::2]
+
+        # Index précalculé : premier horodatage de chaque bloc, une page lue tous les BLOCK_SIZE échantillons
+        self.__blockTimes = array("d", self.__times[::BLOCK_SIZE])
+        # Résumés (min, max, somme) des blocs entiers, calculés à la première lecture
+        self.__summaries: Dict[int, Tuple[float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__times)
+
+    def __enter__(self) -> "TelemetryLog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__times.release()
+        self.__values.release()
+        self.__view.release()
+        self.__buffer.close()
+        self.__file.close()
+
+    def time(self, index: int) -> float:
+        return self.__times[index]
+
+    def value(self, index: int) -> float:
+        return self.__values[index]
+
+    def start(self) -> float:
+        return self.__times[0] if len(self) else 0.0
+
+    def end(self) -> float:
+        return self.__times[-1] if len(self) else 0.0
+
+    def indexAfter(self, time: float) -> int:
+        # Indice du premier échantillon strictement postérieur à `time`
+        block = bisect.bisect_right(self.__blockTimes, time) - 1
+        if block < 0:
+            return 0
+        first = block * BLOCK_SIZE
+        return bisect.bisect_right(self.__times, time, first, min(len(self), first + BLOCK_SIZE))
+
+    def sampleAt(self, time: float) -> Optional[float]:
+        # Dernière valeur connue à l'instant `time`
+        index = self.indexAfter(time)
+        return self.__values[index - 1] if index else None
+
+    def window(self, start: float, end: float) -> Optional[TelemetryWindow]:
+        # Enveloppe des échantillons de ]start, end] ; None si aucun n'y tombe
+        first = self.indexAfter(start)
+        last = self.indexAfter(end)
+        if first >= last:
+            return None
+
+        minimum, maximum, total = self.__summarize(first, last)
+        count = last - first
+        return TelemetryWindow(self.__values[last - 1], minimum, maximum, total / count, count)
+
+    def __summarize(self, first: int, last: int) -> Tuple[float, float, float]:
+        # Bords partiels lus directement, blocs entiers pris dans les résumés
+        firstBlock = -(-first // BLOCK_SIZE)
+        lastBlock = last // BLOCK_SIZE
+        if firstBlock >= lastBlock:
+            return self.__scan(first, last)
+
+        parts = [self.__blockSummary(block) for block in range(firstBlock, lastBlock)]
+        if first < firstBlock * BLOCK_SIZE:
+            parts.append(self.__scan(first, firstBlock * BLOCK_SIZE))
+        if lastBlock * BLOCK_SIZE < last:
+            parts.append(self.__scan(lastBlock * BLOCK_SIZE, last))
+
+        return (min(part[0] for part in parts), max(part[1] for part in parts), sum(part[2] for part in parts))
+
+    def __blockSummary(self, block: int) -> Tuple[float, float, float]:
+        summary = self.__summaries.get(block)
+        if summary is None:
+            summary = self.__summaries[block] = self.__scan(block * BLOCK_SIZE, (block + 1) * BLOCK_SIZE)
+        return summary
+
+    def __scan(self, first: int, last: int) -> Tuple[float, float, float]:
+        values = self.__values[first:last]
+        return min(values), max(values), sum(values)
+
+
+class TelemetryReplay(QObject):
+    # Rejoue un journal en temps réel ou accéléré ; une valeur par image quelle que soit la densité du journal
+    window = Signal(object)
+    valueChanged = Signal(float)
+    finished = Signal()
+
+    def __init__(self, log: TelemetryLog, reduction: Reduction = Reduction.Last, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.__log = log
+        self.__reduction = reduction
+        self.__rate = 1.0
+        self.__position = log.start()
+        self.__playing = False
+
+    def log(self) -> TelemetryLog:
+        return self.__log
+
+    def reduction(self) -> Reduction:
+        return self.__reduction
+
+    def setReduction(self, reduction: Reduction) -> None:
+        # Maximum pour ne perdre aucun pic en avance rapide ; Last pour un cap de boussole
+        self.__reduction = reduction
+
+    def rate(self) -> float:
+        return self.__rate
+
+    def setRate(self, rate: float) -> None:
+        # 1 pour le temps réel, 100 pour une avance rapide cent fois plus vite
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.__rate = rate
+
+    def position(self) -> float:
+        return self.__position
+
+    def seek(self, time: float) -> None:
+        # Saut direct : on affiche la dernière valeur connue à cet instant, sans parcourir l'intervalle
+        self.__position = min(max(time, self.__log.start()), self.__log.end())
+        value = self.__log.sampleAt(self.__position)
+        if value is not None:
+            self.window.emit(TelemetryWindow(value, value, value, value, 1))
+            self.valueChanged.emit(value)
+
+    def isPlaying(self) -> bool:
+        return self.__playing
+
+    def play(self) -> None:
+        if self.__playing:
+            return
+        # Les fenêtres excluent leur début : le premier échantillon du journal est émis au départ
+        if self.__position >= self.__log.end() or self.__position <= self.__log.start():
+            self.seek(self.__log.start())
+        self.__playing = True
+        AnimationDriver.instance().start(self, self.__advance)
+
+    def pause(self) -> None:
+        self.__playing = False
+        AnimationDriver.instance().stop(self)
+
+    def __advance(self, elapsed: float) -> bool:
+        # Appelé une fois par image : tous les échantillons de l'intervalle sont réduits en une seule valeur
+        if not self.__playing:
+            return False
+
+        start = self.__position
+        self.__position = min(start + elapsed * self.__rate, self.__log.end())
+
+        window = self.__log.window(start, self.__position)
+        if window is not None:
+            self.window.emit(window)
+            self.valueChanged.emit(window.value(self.__reduction))
+
+        if self.__position >= self.__log.end():
+            self.__playing = False
+            self.finished.emit()
+            return False
+        return True
+
+
+class MainWindow(QMainWindow):
+
+    def __init__(self, speedLog: TelemetryLog, headingLog: Optional[TelemetryLog], rate: float):
+        from .Compass import CompassWidget
+        from .Speedometer import SpeedWidget
+
+        super().__init__()
+        self.setWindowTitle("Telemetry replay")
+        self.resize(1000 if headingLog is not None else 500, 500)
+
+        widget = QWidget()
+        hBox = QHBoxLayout(widget)
+        self.setCentralWidget(widget)
+
+        # En avance rapide, le compteur montre le maximum de chaque image pour ne manquer aucun pic
+        speed = SpeedWidget()
+        hBox.addWidget(speed)
+        self.speedReplay = TelemetryReplay(speedLog, Reduction.Maximum if rate > 1 else Reduction.Last, self)
+        self.speedReplay.setRate(rate)
+        self.speedReplay.valueChanged.connect(speed.setSpeed)
+        self.speedReplay.play()
+
+        self.headingReplay = None
+        if headingLog is not None:
+            compass = CompassWidget()
+            hBox.addWidget(compass)
+            self.headingReplay = TelemetryReplay(headingLog, Reduction.Last, self)
+            self.headingReplay.setRate(rate)
+            self.headingReplay.valueChanged.connect(compass.setHeading)
+            self.headingReplay.play()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay logged telemetry through a speedometer and a compass")
+    parser.add_argument("speed", help="speed log: raw little endian float64 (seconds, value) pairs or .npy")
+    parser.add_argument("--heading", help="heading log in the same format")
+    parser.add_argument("--rate", type=float, default=1.0, help="playback speed, 100 for 100x fast-forward")
+    parser.add_argument("--start", type=float, help="log time to start from, in seconds")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    window = MainWindow(TelemetryLog(args.speed), TelemetryLog(args.heading) if args.heading else None, args.rate)
+    if args.start is not None:
+        window.speedReplay.seek(args.start)
+        if window.headingReplay is not None:
+            window.headingReplay.seek(args.start)
+    window.show()
+
+    sys.exit(app.exec())
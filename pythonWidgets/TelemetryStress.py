@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# Le test tourne sans affichage, les peintures se font dans le backing store offscreen
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QObject, Signal
+from PySide6.QtWidgets import QApplication
+
+DEFAULT_SAMPLES = [100_000, 1_000_000, 4_000_000]
+DEFAULT_SIZE = 400
+
+
+class Producer(QObject):
+    # Pousse `samples` valeurs depuis un thread de travail, aussi vite que possible
+    finished = Signal()
+
+    def __init__(self, buffer, samples: int):
+        super().__init__()
+        self.__buffer = buffer
+        self.__samples = samples
+        self.elapsed = 0.0
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.__run, daemon=True)
+        thread.start()
+        return thread
+
+    def __run(self) -> None:
+        from .Speedometer import MAX_SPEED
+
+        push = self.__buffer.push
+        start = time.perf_counter()
+        for index in range(self.__samples):
+            push(index % (MAX_SPEED + 1))
+        self.elapsed = time.perf_counter() - start
+        self.finished.emit()
+
+
+def stress(samples: int, size: int, reduction: str) -> dict:
+    from .PaintStats import PaintStats
+    from .Speedometer import MAX_SPEED, SpeedWidget
+    from .Telemetry import Reduction, TelemetryBuffer
+
+    widget = SpeedWidget()
+    widget.resize(size, size)
+    stats = PaintStats()
+    widget.setPaintStats(stats)
+
+    buffer = TelemetryBuffer()
+    widget.setTelemetry(buffer, Reduction[reduction])
+    widget.show()
+    QApplication.processEvents()
+    stats.reset()
+
+    producer = Producer(buffer, samples)
+    loop = QEventLoop()
+    producer.finished.connect(loop.quit)
+
+    # Temps CPU consommé par le seul thread de l'interface pendant l'ingestion
+    cpuStart = time.thread_time()
+    wallStart = time.perf_counter()
+    thread = producer.start()
+    loop.exec()
+    wall = time.perf_counter() - wallStart
+    cpu = time.thread_time() - cpuStart
+    thread.join()
+
+    # Dernière image : la valeur affichée doit être le dernier échantillon poussé
+    widget.repaint()
+    expected = (samples - 1) % (MAX_SPEED + 1)
+    shown = widget.model().speed()
+
+    summary = stats.summary()
+    widget.close()
+    widget.deleteLater()
+
+    return {
+        "samples": samples,
+        "reduction": reduction,
+        "producerSeconds": producer.elapsed,
+        "samplesPerSecond": samples / producer.elapsed if producer.elapsed else 0.0,
+        "notifications": buffer.notified,
+        "paints": summary["paints"],
+        "paintsPerSecond": summary["paints"] / wall,
+        "guiCpuSeconds": cpu,
+        "guiLoad": cpu / wall,
+        "paintMs": summary["durationMs"],
+        "lastValueShown": shown == expected,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Push telemetry samples from a worker thread into a SpeedWidget")
+    parser.add_argument("--samples", nargs="+", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--reduction", choices=["Last", "Minimum", "Maximum", "Mean"], default="Last")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication([])
+    report = {"results": [stress(samples, args.size, args.reduction) for samples in args.samples]}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    # Le test échoue si une seule exécution n'a pas affiché la dernière valeur
+    return 0 if all(result["lastValueShown"] for result in report["results"]) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
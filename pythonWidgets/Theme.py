@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import Dict, Sequence, Tuple
+
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QBrush, QColor, QLinearGradient, QPen
+
+DEFAULT_CAPACITY = 1024
+
+# Les dégradés sont indexés sur le rayon arrondi au centième de pixel : la transition nette
+# du cerclage à mi-hauteur se décalerait visiblement avec un arrondi plus grossier
+RADIUS_BUCKET = 0.01
+
+
+class Theme:
+    # Couleurs et dégradés nommés ; le nom du thème fait partie des clés du cache
+
+    def __init__(self, name: str, colors: Dict[str, str], gradients: Dict[str, Sequence[Tuple[float, str]]]):
+        self.name = name
+        self.colors = dict(colors)
+        self.gradients = {key: tuple(stops) for key, stops in gradients.items()}
+
+
+DEFAULT_THEME = Theme(
+    "default",
+    colors={
+        "dial": "#212121",
+    },
+    gradients={
+        # Cerclage des cadrans, clair en haut et sombre en bas
+        "bezel": ((0, "#E0E0E0"), (0.5, "#6E7774"), (0.51, "#0a0e0a"), (1, "#0a0809")),
+        "innerBezel": ((0, "#212121"), (1, "#0a0809")),
+    },
+)
+
+
+class ResourceCache:
+    # Couleurs, stylos, pinceaux et dégradés construits une seule fois et partagés par tous les widgets.
+    # Les objets rendus ne doivent pas être modifiés : QPainter en prend une copie de toute façon.
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.__capacity = capacity
+        self.__resources = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__resources)
+
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def setCapacity(self, capacity: int) -> None:
+        self.__capacity = capacity
+        self.__evict()
+
+    def clear(self) -> None:
+        self.__resources.clear()
+
+    def color(self, spec: str) -> QColor:
+        # `spec` : "#rrggbb", "#aarrggbb" ou un nom SVG, analysé une seule fois
+        return self.__get(("color", spec), lambda: QColor(spec))
+
+    def brush(self, spec: str) -> QBrush:
+        return self.__get(("brush", spec), lambda: QBrush(self.color(spec)))
+
+    def pen(self, spec: str, width: float = 1, capStyle: Qt.PenCapStyle = Qt.SquareCap) -> QPen:
+        return self.__get(("pen", spec, width, capStyle),
+                          lambda: QPen(self.color(spec), width, Qt.SolidLine, capStyle))
+
+    def themeColor(self, theme: Theme, name: str) -> QColor:
+        return self.color(theme.colors[name])
+
+    def gradient(self, theme: Theme, name: str, radius: float) -> QLinearGradient:
+        # Dégradé vertical de 0 à 2 * rayon, comme le dessinaient les widgets
+        bucket = round(radius / RADIUS_BUCKET) * RADIUS_BUCKET
+        return self.__get(("gradient", theme.name, name, bucket),
+                          lambda: self.__newGradient(theme.gradients[name], bucket))
+
+    def gradientPen(self, theme: Theme, name: str, radius: float, width: float) -> QPen:
+        bucket = round(radius / RADIUS_BUCKET) * RADIUS_BUCKET
+        return self.__get(("gradientPen", theme.name, name, bucket, width),
+                          lambda: QPen(self.gradient(theme, name, bucket), width))
+
+    def __newGradient(self, stops: Sequence[Tuple[float, str]], radius: float) -> QLinearGradient:
+        gradient = QLinearGradient(QPointF(0, 0), QPointF(0, radius * 2))
+        for position, spec in stops:
+            gradient.setColorAt(position, self.color(spec))
+        return gradient
+
+    def __get(self, key: tuple, build):
+        resource = self.__resources.get(key)
+        if resource is not None:
+            self.hits += 1
+            self.__resources.move_to_end(key)
+            return resource
+
+        self.misses += 1
+        resource = self.__resources[key] = build()
+        self.__evict()
+        return resource
+
+    def __evict(self) -> None:
+        # On retire les ressources les moins récemment utilisées
+        while len(self.__resources) > self.__capacity:
+            self.__resources.popitem(last=False)
+
+
+# Cache commun à tous les widgets
+resources = ResourceCache()
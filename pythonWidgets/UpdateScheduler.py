@@ -0,0 +1,136 @@
+import math
+from enum import Enum
+from typing import Optional
+
+from PySide6.QtCore import QRect, QTimer, Qt, QElapsedTimer
+from PySide6.QtGui import QRegion
+from PySide6.QtWidgets import QWidget
+
+DEFAULT_FPS = 60
+
+# Horloge monotone commune à tous les ordonnanceurs
+_clock = QElapsedTimer()
+_clock.start()
+
+
+class UpdateMode(Enum):
+    # repaint() synchrone à chaque nouvelle valeur (ancien comportement)
+    Immediate = 0
+    # update() regroupés, au plus une peinture par intervalle d'image
+    Coalesced = 1
+
+
+class UpdateScheduler:
+    # Simple objet Python attaché au widget, plutôt qu'un QObject enfant de plus par instance
+    __slots__ = ("__widget", "__mode", "__maxFps", "__pending", "__lastPaint", "__dirty", "__full", "__requested",
+                 "__performed", "__timer", "__weakref__")
+
+    def __init__(self, widget: QWidget, maxFps: Optional[float] = None):
+        self.__widget = widget
+        self.__mode = UpdateMode.Coalesced
+        self.__maxFps = None
+        self.__pending = False
+        self.__lastPaint = None
+
+        # Zone à repeindre accumulée en attendant le prochain intervalle
+        self.__dirty = QRegion()
+        self.__full = False
+
+        self.__requested = 0
+        self.__performed = 0
+
+        # Créé au premier report de peinture : un widget peint moins souvent que maxFps n'en a jamais besoin
+        self.__timer = None
+
+        self.setMaxFps(maxFps)
+
+    def mode(self) -> UpdateMode:
+        return self.__mode
+
+    def setMode(self, mode: UpdateMode) -> None:
+        self.__mode = mode
+        if mode is UpdateMode.Immediate and self.__timer is not None:
+            self.__timer.stop()
+
+    def maxFps(self) -> float:
+        if self.__maxFps is not None:
+            return self.__maxFps
+
+        # Sans valeur explicite, on se cale sur la fréquence de l'écran
+        screen = self.__widget.screen()
+        if screen is not None and screen.refreshRate() > 0:
+            return screen.refreshRate()
+        return DEFAULT_FPS
+
+    def setMaxFps(self, fps: Optional[float]) -> None:
+        if fps is not None and fps <= 0:
+            raise ValueError("maxFps must be positive")
+        self.__maxFps = fps
+
+    def requestUpdate(self, rect: Optional[QRect] = None) -> None:
+        # Sans rectangle, c'est tout le widget qui est à repeindre
+        self.__requested += 1
+
+        if self.__mode is UpdateMode.Immediate:
+            if rect is None:
+                self.__widget.repaint()
+            else:
+                self.__widget.repaint(rect)
+            return
+
+        # Une peinture est déjà postée : Qt fusionne la nouvelle zone avec la sienne
+        if self.__pending:
+            if rect is None:
+                self.__widget.update()
+            else:
+                self.__widget.update(rect)
+            return
+
+        if rect is None:
+            self.__full = True
+        elif not self.__full:
+            self.__dirty += rect
+
+        if self.__timer is not None and self.__timer.isActive():
+            return
+
+        remaining = 0
+        if self.__lastPaint is not None:
+            remaining = 1000 / self.maxFps() - (_clock.elapsed() - self.__lastPaint)
+
+        if remaining <= 0:
+            self.__flush()
+            return
+
+        if self.__timer is None:
+            self.__timer = QTimer(self.__widget)
+            self.__timer.setSingleShot(True)
+            self.__timer.setTimerType(Qt.PreciseTimer)
+            self.__timer.timeout.connect(self.__flush)
+        self.__timer.start(math.ceil(remaining))
+
+    def paintPerformed(self) -> None:
+        # Appelé par le widget à la fin de chaque paintEvent
+        self.__performed += 1
+        self.__pending = False
+        self.__lastPaint = _clock.elapsed()
+
+    def requestedCount(self) -> int:
+        return self.__requested
+
+    def performedCount(self) -> int:
+        return self.__performed
+
+    def resetCounters(self) -> None:
+        self.__requested = 0
+        self.__performed = 0
+
+    def __flush(self) -> None:
+        self.__pending = True
+        if self.__full or self.__dirty.isEmpty():
+            self.__widget.update()
+        else:
+            self.__widget.update(self.__dirty)
+
+        self.__dirty = QRegion()
+        self.__full = False
@@ -0,0 +1,60 @@
+import importlib
+from typing import TYPE_CHECKING, List
+
+# Les widgets sont chargés à la demande : importer SpeedWidget ne charge ni l'horloge, ni la boussole,
+# ni les outils de télémétrie. Nom exporté -> module qui le définit.
+# Les classes qui portent le nom de leur module (PaintStats, Theme...) ne sont pas exportées :
+# l'import du sous-module remplacerait l'attribut du paquet.
+_EXPORTS = {
+    "SpeedWidget": "Speedometer",
+    "SpeedModel": "Speedometer",
+    "ClockWidget": "Clock",
+    "ClockModel": "Clock",
+    "CompassWidget": "Compass",
+    "CompassModel": "Compass",
+    "DigitalClockWidget": "DigitalClock",
+    "DigitalClockModel": "DigitalClock",
+    "DashboardWidget": "Dashboard",
+    "SampleHistory": "History",
+    "SharedDashboardWidget": "SharedRender",
+    "SharedRenderPool": "SharedRender",
+    "RenderBackend": "GaugeWidget",
+    "RenderStrategy": "DialSpec",
+    "UpdateMode": "UpdateScheduler",
+    "AnimationDriver": "Animation",
+    "Reduction": "Telemetry",
+    "TelemetryBuffer": "Telemetry",
+    "TelemetryLog": "TelemetryReplay",
+}
+
+__all__ = sorted(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .Animation import AnimationDriver
+    from .Clock import ClockModel, ClockWidget
+    from .Compass import CompassModel, CompassWidget
+    from .Dashboard import DashboardWidget
+    from .DialSpec import RenderStrategy
+    from .DigitalClock import DigitalClockModel, DigitalClockWidget
+    from .GaugeWidget import RenderBackend
+    from .History import SampleHistory
+    from .SharedRender import SharedDashboardWidget, SharedRenderPool
+    from .Speedometer import SpeedModel, SpeedWidget
+    from .Telemetry import Reduction, TelemetryBuffer
+    from .TelemetryReplay import TelemetryLog
+    from .UpdateScheduler import UpdateMode
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    # Importé une seule fois : les accès suivants trouvent la valeur dans le module
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))